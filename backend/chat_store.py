@@ -0,0 +1,261 @@
+"""
+NELFUND Chat History Store
+Keeps chat messages in SQLite with an index on (user_id, session_id, ts)
+"""
+
+import sqlite3
+import threading
+from typing import List, Optional
+
+import orjson
+
+
+def open_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite connection tuned for small, frequent writes
+    
+    WAL with synchronous=NORMAL avoids an fsync on every commit; losing the
+    last few chat rows on power failure is acceptable for this data.
+    
+    Args:
+        db_path: Path to the SQLite database file
+        
+    Returns:
+        Connection shared across threads (callers serialise access)
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+class ChatStore:
+    """
+    SQLite-backed storage for chat messages
+    
+    Chat history is only ever looked up by user and session, which a B-tree
+    index answers directly instead of scanning a Chroma collection.
+    """
+    
+    def __init__(self, db_path: str = "./chat_history.db"):
+        """
+        Open (and create if needed) the chat database
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = open_connection(db_path)
+        self._create_schema()
+    
+    def _create_schema(self) -> None:
+        """Create the chats table and its lookup index"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chats (
+                    chat_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    ts TEXT NOT NULL,
+                    user_msg TEXT NOT NULL,
+                    bot_resp TEXT NOT NULL,
+                    sources TEXT NOT NULL DEFAULT '[]'
+                )
+                """
+            )
+            # Databases created before sources were stored lack the column
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(chats)")}
+            if "sources" not in columns:
+                self._conn.execute("ALTER TABLE chats ADD COLUMN sources TEXT NOT NULL DEFAULT '[]'")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_user_session "
+                "ON chats(user_id, session_id, ts)"
+            )
+            # User-wide history is read newest first; without this index
+            # SQLite sorts every matching row in a temp B-tree per request
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_user_ts "
+                "ON chats(user_id, ts)"
+            )
+    
+    def add_chat(
+        self,
+        chat_id: str,
+        user_id: str,
+        session_id: str,
+        user_message: str,
+        bot_response: str,
+        timestamp: str,
+        sources: Optional[List[str]] = None
+    ) -> None:
+        """
+        Store one user message and the assistant's reply
+        
+        Args:
+            chat_id: Unique id for this exchange
+            user_id: Owner of the session
+            session_id: Conversation the exchange belongs to
+            user_message: What the user asked
+            bot_response: What the assistant answered
+            timestamp: ISO-8601 timestamp of the exchange
+            sources: Documents cited in the reply, stored as a JSON array
+        """
+        sources_json = orjson.dumps(sources or []).decode("utf-8")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO chats (chat_id, user_id, session_id, ts, user_msg, bot_resp, sources) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chat_id, user_id, session_id, timestamp, user_message, bot_response, sources_json)
+            )
+    
+    def get_session_chats(self, user_id: str, session_id: str) -> List[dict]:
+        """
+        Get a user's messages for one session, oldest first
+        
+        Args:
+            user_id: Owner of the session
+            session_id: Session to read
+        
+        Returns:
+            List of chat dictionaries, including their sources
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chat_id, session_id, ts, user_msg, bot_resp, sources FROM chats "
+                "WHERE user_id = ? AND session_id = ? ORDER BY ts",
+                (user_id, session_id)
+            ).fetchall()
+        
+        chats = []
+        for row in rows:
+            chat = self._row_to_chat(row)
+            chat["sources"] = orjson.loads(row["sources"])
+            chats.append(chat)
+        return chats
+    
+    def get_user_chats(self, user_id: str) -> List[dict]:
+        """
+        Get all of a user's messages, newest first
+        
+        Args:
+            user_id: User whose chats to read
+        
+        Returns:
+            List of chat dictionaries
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chat_id, session_id, ts, user_msg, bot_resp FROM chats "
+                "WHERE user_id = ? ORDER BY ts DESC",
+                (user_id,)
+            ).fetchall()
+        return [self._row_to_chat(row) for row in rows]
+    
+    def get_sessions(self, user_id: str) -> List[dict]:
+        """
+        Summarise a user's sessions, aggregated in SQLite
+        
+        Args:
+            user_id: User whose sessions to list
+        
+        Returns:
+            List of session dictionaries, oldest session first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT
+                    c1.session_id AS session_id,
+                    MIN(c1.ts) AS ts,
+                    COUNT(*) AS message_count,
+                    (
+                        SELECT substr(c2.user_msg, 1, 50) FROM chats c2
+                        WHERE c2.user_id = c1.user_id AND c2.session_id = c1.session_id
+                        ORDER BY c2.ts LIMIT 1
+                    ) AS first_message
+                FROM chats c1
+                WHERE c1.user_id = ?
+                GROUP BY c1.session_id
+                ORDER BY MIN(c1.ts)
+                """,
+                (user_id,)
+            ).fetchall()
+        return [
+            {
+                "session_id": row["session_id"],
+                "first_message": row["first_message"],
+                "timestamp": row["ts"],
+                "message_count": row["message_count"]
+            }
+            for row in rows
+        ]
+    
+    def delete_session(self, user_id: str, session_id: str) -> int:
+        """
+        Delete all of a user's messages in a session
+        
+        Args:
+            user_id: Owner of the session
+            session_id: Session to delete
+        
+        Returns:
+            Number of messages deleted
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM chats WHERE user_id = ? AND session_id = ?",
+                (user_id, session_id)
+            )
+        return cursor.rowcount
+    
+    def is_empty(self) -> bool:
+        """Check whether any chats have been stored yet"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM chats LIMIT 1").fetchone()
+        return row is None
+    
+    def import_from_chroma(self, collection) -> int:
+        """
+        Copy chats from the legacy ChromaDB "chats" collection
+        
+        Args:
+            collection: ChromaDB collection with chat metadata
+        
+        Returns:
+            Number of chats imported
+        """
+        results = collection.get()
+        rows = []
+        for chat_id, metadata in zip(results['ids'], results['metadatas']):
+            rows.append((
+                chat_id,
+                metadata['user_id'],
+                metadata['session_id'],
+                metadata['timestamp'],
+                metadata['user_message'],
+                metadata['bot_response']
+            ))
+        
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chats (chat_id, user_id, session_id, ts, user_msg, bot_resp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+    
+    @staticmethod
+    def _row_to_chat(row: sqlite3.Row) -> dict:
+        """Convert a database row to the API's chat dictionary"""
+        return {
+            "id": row["chat_id"],
+            "session_id": row["session_id"],
+            "user_message": row["user_msg"],
+            "bot_response": row["bot_resp"],
+            "timestamp": row["ts"]
+        }
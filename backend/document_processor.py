@@ -4,39 +4,426 @@ Loads PDFs, processes them, and creates optimized chunks for RAG
 """
 
 import os
-from typing import List, Dict
+import json
+import hashlib
+import functools
+import itertools
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Iterator, Optional, Set, Tuple
 from pathlib import Path
 
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
+import numpy as np
+from tqdm import tqdm
+from langchain_community.document_loaders import PyMuPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
+try:
+    # Parquet chunk cache; optional, parsing simply runs every time without it
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    # SIMD byte-level chunker; optional, the recursive splitter is the fallback
+    from chonkie import FastChunker
+except ImportError:
+    FastChunker = None
+
+
+@functools.lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """
+    Build (once per size/overlap pair) the splitter used for chunking
+    """
+    # RecursiveCharacterTextSplitter is best for maintaining semantic meaning
+    # It tries to split on paragraphs, then sentences, then words
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        # Offsets in the page text, used to merge neighbouring chunks
+        add_start_index=True,
+        separators=[
+            "\n\n",  # Split on paragraph breaks first
+            "\n",    # Then single line breaks
+            ". ",    # Then sentences
+            " ",     # Then words
+            ""       # Then characters (last resort)
+        ]
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_fast_chunker(chunk_size: int, chunk_overlap: int) -> "FastChunker":
+    """
+    Build (once per size/overlap pair) the Chonkie FastChunker
+    """
+    # FastChunker has no overlap of its own, so leave room for the tail of
+    # the previous chunk that _fast_split prepends
+    return FastChunker(chunk_size=max(1, chunk_size - chunk_overlap))
+
+
+def _fast_split(page: Document, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """
+    Split one page with FastChunker, re-adding overlap between chunks
+    
+    Args:
+        page: Page Document to split
+        chunk_size: Maximum size per chunk (FastChunker measures bytes)
+        chunk_overlap: Characters carried over from the previous chunk
+        
+    Returns:
+        List of chunk Documents sharing the page's metadata, each with the
+        character offset where it starts in the page as "start_index"
+    """
+    chunker = _get_fast_chunker(chunk_size, chunk_overlap)
+    
+    chunks: List[Document] = []
+    previous = ""
+    cursor = 0
+    for piece in chunker.chunk(page.page_content):
+        # Chonkie reports byte offsets; locate the piece by characters
+        piece_start = page.page_content.find(piece.text, cursor)
+        if piece_start >= 0:
+            cursor = piece_start + len(piece.text)
+        
+        prefix = previous[-chunk_overlap:] if previous and chunk_overlap else ""
+        previous = piece.text
+        
+        raw = prefix + piece.text
+        text = raw.strip()
+        if text:
+            start = -1
+            if piece_start >= 0:
+                start = piece_start - len(prefix) + len(raw) - len(raw.lstrip())
+            metadata = dict(page.metadata)
+            metadata["start_index"] = start
+            chunks.append(Document(page_content=text, metadata=metadata))
+    
+    return chunks
+
+
+def _merge_adjacent(
+    chunks: List[Document],
+    page_text: str,
+    max_size: int,
+    min_size: int,
+    overlap: int
+) -> List[Document]:
+    """
+    Split-then-merge pass that folds undersized chunks into their neighbours
+    
+    Walks one page's chunks in order and merges a chunk into the previous
+    one when either the merged text still fits in max_size or one side is
+    smaller than min_size. The merged text is cut from the page between
+    the two chunks' offsets ("start_index"), so the overlap the splitter
+    repeated appears once and nothing in between is lost; chunks whose
+    offset is unknown are never merged. Merged chunks that end up larger
+    than 1.1x max_size are split again.
+    
+    Args:
+        chunks: Chunks of page_text in order
+        page_text: Text of the page the chunks came from
+        max_size: Target maximum characters per chunk
+        min_size: Chunks shorter than this are always merged when possible
+        overlap: Chunk overlap used by the splitter
+        
+    Returns:
+        New list of chunks
+    """
+    merged: List[Document] = []
+    # Page offsets (start, end) of each merged chunk; None when unknown
+    spans: List[Optional[Tuple[int, int]]] = []
+    for chunk in chunks:
+        start = chunk.metadata.get("start_index", -1)
+        span = None
+        if start >= 0 and page_text.startswith(chunk.page_content, start):
+            span = (start, start + len(chunk.page_content))
+        
+        if merged and span is not None and spans[-1] is not None:
+            last = merged[-1]
+            last_start, last_end = spans[-1]
+            end = max(last_end, span[1])
+            text = page_text[last_start:end]
+            undersized = min(len(last.page_content), len(chunk.page_content)) < min_size
+            if len(text) <= max_size or undersized:
+                last.page_content = text
+                spans[-1] = (last_start, end)
+                continue
+        merged.append(Document(page_content=chunk.page_content, metadata=dict(chunk.metadata)))
+        spans.append(span)
+    
+    limit = int(max_size * 1.1)
+    if all(len(chunk.page_content) <= limit for chunk in merged):
+        return merged
+    
+    text_splitter = _get_splitter(max_size, overlap)
+    result: List[Document] = []
+    for chunk in merged:
+        if len(chunk.page_content) > limit:
+            offset = chunk.metadata.get("start_index", -1)
+            for piece in text_splitter.split_documents([chunk]):
+                # The splitter counts from the start of the merged chunk
+                if offset >= 0 and piece.metadata["start_index"] >= 0:
+                    piece.metadata["start_index"] += offset
+                result.append(piece)
+        else:
+            result.append(chunk)
+    return result
+
+
+# Maps absolute PDF path -> [size, mtime_ns, sha256] inside the cache directory
+DIGEST_INDEX_FILE = "digests.json"
+
+# Part of every chunk cache file name; bump it whenever the chunks produced
+# for the same file and settings change, so older entries are not served
+CHUNK_CACHE_VERSION = 2
+
+
+def _file_digest(path: str) -> str:
+    """SHA-256 of a file's bytes, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_digest_index(cache_directory: str) -> Dict[str, list]:
+    """Load the digests recorded by earlier runs (empty when missing or unreadable)"""
+    try:
+        with open(Path(cache_directory) / DIGEST_INDEX_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_digest_index(cache_directory: str, index: Dict[str, list]) -> None:
+    """Persist the digest index, replacing it atomically"""
+    index_file = Path(cache_directory) / DIGEST_INDEX_FILE
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = index_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_file, index_file)
+    except OSError as e:
+        print(f"Warning: Could not write digest index {index_file}: {e}")
+
+
+def _cache_path(
+    digest: str,
+    cache_directory: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    use_fast_chunker: bool
+) -> Path:
+    """
+    Locate the chunk cache file for a PDF's contents
+    
+    The SHA-256 of the file bytes identifies the contents; the chunking
+    settings and CHUNK_CACHE_VERSION are part of the name so changing them
+    never serves stale chunks.
+    """
+    chunker = "fast" if use_fast_chunker else "recursive"
+    name = f"{digest}_v{CHUNK_CACHE_VERSION}_{chunker}_{chunk_size}_{chunk_overlap}.parquet"
+    return Path(cache_directory) / name
+
+
+def _read_chunk_cache(cache_file: Path, path: str) -> Optional[Tuple[List[Document], List[int]]]:
+    """
+    Load cached chunks for a PDF, or None on a miss
+    
+    Source metadata is rewritten to the current path, since identical
+    contents may have been cached under another file name.
+    """
+    if not cache_file.exists():
+        return None
+    
+    try:
+        table = pq.read_table(cache_file)
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable chunk cache {cache_file}: {e}")
+        return None
+    
+    chunks = []
+    for text, metadata_json in zip(
+        table.column("page_content").to_pylist(),
+        table.column("metadata_json").to_pylist()
+    ):
+        metadata = json.loads(metadata_json)
+        metadata["source"] = path
+        if "file_path" in metadata:
+            metadata["file_path"] = path
+        chunks.append(Document(page_content=text, metadata=metadata))
+    
+    stats = table.schema.metadata or {}
+    if b"page_lengths" not in stats:
+        # Written before per-page lengths were cached; rebuild the entry
+        return None
+    return chunks, json.loads(stats[b"page_lengths"])
+
+
+def _write_chunk_cache(
+    cache_file: Path,
+    chunks: List[Document],
+    page_lengths: List[int]
+) -> None:
+    """Persist a PDF's chunks as Snappy-compressed parquet"""
+    table = pa.table({
+        "chunk_id": list(range(len(chunks))),
+        "page_content": [chunk.page_content for chunk in chunks],
+        "metadata_json": [json.dumps(chunk.metadata) for chunk in chunks],
+    }).replace_schema_metadata({
+        "page_lengths": json.dumps(page_lengths),
+    })
+    
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        pq.write_table(table, tmp_file, compression="snappy")
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        print(f"Warning: Could not write chunk cache {cache_file}: {e}")
+
+
+def _load_pdf(path: str) -> List[Document]:
+    """
+    Load every page of a single PDF
+    
+    Kept at module level so it can be pickled into worker processes.
+    """
+    return PyMuPDFLoader(path).load()
+
+
+def _load_and_split(
+    path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    use_fast_chunker: bool = False,
+    cache_file: Optional[Path] = None
+) -> Tuple[List[Document], List[int]]:
+    """
+    Stream the pages of a single PDF straight into the splitter
+    
+    Pages are produced lazily and dropped as soon as their chunks exist,
+    so a whole file is never held in memory as page Documents. When a
+    cache file is given, the chunks are written to it for the next run.
+    
+    Returns:
+        Tuple of (chunks, character count of each page)
+    """
+    text_splitter = _get_splitter(chunk_size, chunk_overlap)
+    
+    chunks: List[Document] = []
+    page_lengths: List[int] = []
+    for page in PyMuPDFLoader(path).lazy_load():
+        page_lengths.append(len(page.page_content))
+        if use_fast_chunker:
+            page_chunks = _fast_split(page, chunk_size, chunk_overlap)
+        else:
+            page_chunks = text_splitter.split_documents([page])
+        chunks.extend(_merge_adjacent(
+            page_chunks,
+            page.page_content,
+            max_size=chunk_size,
+            min_size=chunk_size // 4,
+            overlap=chunk_overlap
+        ))
+    
+    # Add chunk metadata for better tracking
+    for chunk in chunks:
+        chunk.metadata["chunk_size"] = len(chunk.page_content)
+    
+    if cache_file is not None:
+        _write_chunk_cache(cache_file, chunks, page_lengths)
+    
+    return chunks, page_lengths
+
 
 class NELFUNDDocumentProcessor:
     """
     Handles loading and chunking of NELFUND policy documents
     """
     
-    def __init__(self, data_directory: str = "./data"):
+    def __init__(
+        self,
+        data_directory: str = "./data",
+        use_fast_chunker: bool = True,
+        cache_directory: Optional[str] = "./chunk_cache"
+    ):
         """
         Initialize the document processor
         
         Args:
             data_directory: Path to folder containing NELFUND PDFs
+            use_fast_chunker: Chunk with Chonkie's FastChunker when installed.
+                Set False to keep RecursiveCharacterTextSplitter, which
+                preserves paragraph boundaries more faithfully.
+            cache_directory: Where chunks are cached by PDF content hash
+                (needs pyarrow). None disables the cache.
         """
         self.data_directory = data_directory
-        self.documents: List[Document] = []
+        self.use_fast_chunker = use_fast_chunker and FastChunker is not None
+        self.cache_directory = cache_directory
         self.chunks: List[Document] = []
         
+        # Per-page character counts gathered while streaming, in place of
+        # keeping the pages themselves
+        self.doc_char_lengths = np.zeros(0, dtype=np.int64)
+        self.sources: Set[str] = set()
+        
     def load_documents(self) -> List[Document]:
         """
         Load all PDF documents from the data directory
         
+        The pages are returned but not retained; chunk_documents() streams
+        the PDFs itself and does not need this to be called first.
+        
         Returns:
             List of Document objects
         """
-        print(f"Loading documents from {self.data_directory}...")
+        paths = self._pdf_paths()
+        documents: List[Document] = []
+        if not paths:
+            print("✓ Loaded 0 document pages")
+            return documents
+        
+        # Text extraction is CPU-bound per file, so parse files in parallel
+        # processes and reassemble them in directory order
+        pages_by_path: Dict[str, List[Document]] = {}
+        with ProcessPoolExecutor(max_workers=self._max_workers(paths)) as executor:
+            futures = {executor.submit(_load_pdf, path): path for path in paths}
+            progress = tqdm(
+                as_completed(futures),
+                total=len(paths),
+                desc="Loading PDFs",
+                unit="file",
+                mininterval=0.5
+            )
+            for future in progress:
+                pages_by_path[futures[future]] = future.result()
+        
+        for path in paths:
+            documents.extend(pages_by_path[path])
+        
+        print(f"✓ Loaded {len(documents)} document pages")
+        return documents
+    
+    def _pdf_paths(self) -> List[str]:
+        """
+        Find all PDF files under the data directory
         
+        Returns:
+            Sorted list of PDF paths (extension matched case-insensitively)
+            
+        Raises:
+            FileNotFoundError: If the data directory does not exist
+        """
         # Check if directory exists
         if not os.path.exists(self.data_directory):
             raise FileNotFoundError(
@@ -44,18 +431,202 @@ class NELFUNDDocumentProcessor:
                 f"Please create it and add your NELFUND PDFs."
             )
         
-        # Load all PDFs from directory
-        loader = DirectoryLoader(
-            self.data_directory,
-            glob="**/*.pdf",
-            loader_cls=PyPDFLoader,
-            show_progress=True
+        return sorted(
+            str(path) for path in Path(self.data_directory).rglob("*")
+            if path.is_file() and path.suffix.lower() == ".pdf"
         )
+    
+    @staticmethod
+    def _max_workers(paths: List[str]) -> int:
+        """One worker process per file, capped at the number of cores"""
+        return max(1, min(len(paths), os.cpu_count() or 1))
+    
+    def _cache_files(
+        self,
+        paths: List[str],
+        chunk_size: int,
+        chunk_overlap: int
+    ) -> Dict[str, Optional[Path]]:
+        """
+        Chunk cache file for each PDF (None everywhere when caching is off)
         
-        self.documents = loader.load()
+        Digests come from the index kept by earlier runs whenever a file's
+        size and modification time are unchanged, so an unchanged PDF costs
+        one stat() instead of being read and hashed again.
+        """
+        if not self.cache_directory or pq is None:
+            return {path: None for path in paths}
         
-        print(f"✓ Loaded {len(self.documents)} document pages")
-        return self.documents
+        index = _read_digest_index(self.cache_directory)
+        cache_files = {}
+        changed = False
+        for path in paths:
+            stat = os.stat(path)
+            fingerprint = [stat.st_size, stat.st_mtime_ns]
+            key = os.path.abspath(path)
+            entry = index.get(key)
+            if entry is not None and entry[:2] == fingerprint:
+                digest = entry[2]
+            else:
+                digest = _file_digest(path)
+                index[key] = fingerprint + [digest]
+                changed = True
+            cache_files[path] = _cache_path(
+                digest, self.cache_directory, chunk_size, chunk_overlap, self.use_fast_chunker
+            )
+        
+        if changed:
+            _write_digest_index(self.cache_directory, index)
+        return cache_files
+    
+    def _parse_uncached(
+        self,
+        cache_files: Dict[str, Optional[Path]],
+        chunk_size: int,
+        chunk_overlap: int
+    ) -> Iterator[Tuple[str, Tuple[List[Document], List[int]]]]:
+        """
+        Parse the PDFs the chunk cache could not serve, in worker processes
+        
+        Largest files are submitted first so the slowest parse starts
+        straight away instead of trailing behind the small ones.
+        
+        Args:
+            cache_files: PDF path -> cache file to fill (None when caching is off)
+            
+        Yields:
+            (path, (chunks, page lengths)) pairs as files finish
+        """
+        if not cache_files:
+            return
+        
+        paths = sorted(cache_files, key=os.path.getsize, reverse=True)
+        with ProcessPoolExecutor(max_workers=self._max_workers(paths)) as executor:
+            futures = {
+                executor.submit(
+                    _load_and_split,
+                    path,
+                    chunk_size,
+                    chunk_overlap,
+                    self.use_fast_chunker,
+                    cache_files[path]
+                ): path
+                for path in paths
+            }
+            try:
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                # Closed early (the caller stopped or a parse failed): don't
+                # start the files still queued just to discard them
+                for future in futures:
+                    future.cancel()
+    
+    def iter_chunks(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        batch_size: int = 128
+    ) -> Iterator[List[Document]]:
+        """
+        Load the PDFs and yield their chunks in batches, in document order
+        
+        Pages stream from each PDF directly into the splitter, and batches
+        are handed out as soon as the files behind them finish, so callers
+        can embed/index chunks without holding the whole corpus in memory.
+        
+        Args:
+            chunk_size: Maximum characters per chunk
+            chunk_overlap: Characters to overlap between chunks (maintains context)
+            batch_size: Number of chunks per yielded batch
+            
+        Yields:
+            Lists of at most batch_size chunked Document objects
+            
+        Raises:
+            FileNotFoundError: If the data directory does not exist
+            ValueError: If no PDF documents were found
+        """
+        paths = self._pdf_paths()
+        if not paths:
+            raise ValueError(f"No PDF documents found in {self.data_directory}")
+        
+        page_lengths: List[int] = []
+        self.doc_char_lengths = np.zeros(0, dtype=np.int64)
+        self.sources = set()
+        
+        chunk_ids = itertools.count()
+        batch: List[Document] = []
+        # Only files without a chunk cache entry go to worker processes, so
+        # a fully cached run starts no pool at all
+        cache_files = self._cache_files(paths, chunk_size, chunk_overlap)
+        misses = {
+            path: cache_file
+            for path, cache_file in cache_files.items()
+            if cache_file is None or not cache_file.exists()
+        }
+        
+        # Closed even if the caller stops early or a parse fails; closing
+        # the parse generator shuts its worker pool down
+        progress = tqdm(
+            total=len(paths),
+            initial=len(paths) - len(misses),
+            desc="Chunking PDFs",
+            unit="file",
+            mininterval=0.5
+        )
+        parsed = self._parse_uncached(misses, chunk_size, chunk_overlap)
+        with progress, closing(parsed):
+            # Files finish in any order; hold results back until every
+            # earlier file has been emitted so chunk ids stay deterministic
+            finished = {}
+            for path in paths:
+                if path in misses:
+                    while path not in finished:
+                        done, result = next(parsed)
+                        finished[done] = result
+                        progress.update()
+                    chunks, file_page_lengths = finished.pop(path)
+                else:
+                    # Read cached chunks only when their turn comes, so they are
+                    # never all in memory at once
+                    cached = _read_chunk_cache(cache_files[path], path)
+                    if cached is None:
+                        cached = _load_and_split(
+                            path,
+                            chunk_size,
+                            chunk_overlap,
+                            self.use_fast_chunker,
+                            cache_files[path]
+                        )
+                    chunks, file_page_lengths = cached
+                
+                page_lengths.extend(file_page_lengths)
+                self.sources.add(path)
+                
+                # chunk_size was set by the worker; ids need the global order
+                for chunk, chunk_id in zip(chunks, chunk_ids):
+                    chunk.metadata["chunk_id"] = chunk_id
+                
+                batch.extend(chunks)
+                while len(batch) >= batch_size:
+                    yield batch[:batch_size]
+                    batch = batch[batch_size:]
+        
+        self.doc_char_lengths = np.asarray(page_lengths, dtype=np.int64)
+        
+        if batch:
+            yield batch
+    
+    @property
+    def total_pages(self) -> int:
+        """Number of pages seen by the last chunking run"""
+        return int(self.doc_char_lengths.size)
+    
+    @property
+    def total_chars(self) -> int:
+        """Number of characters across all pages of the last chunking run"""
+        return int(self.doc_char_lengths.sum())
     
     def chunk_documents(
         self,
@@ -63,7 +634,10 @@ class NELFUNDDocumentProcessor:
         chunk_overlap: int = 200
     ) -> List[Document]:
         """
-        Split documents into smaller chunks for better retrieval
+        Load the PDFs and split them into smaller chunks for better retrieval
+        
+        Collects iter_chunks() into a single list; prefer iter_chunks() for
+        large corpora.
         
         Args:
             chunk_size: Maximum characters per chunk
@@ -71,34 +645,18 @@ class NELFUNDDocumentProcessor:
             
         Returns:
             List of chunked Document objects
+            
+        Raises:
+            FileNotFoundError: If the data directory does not exist
+            ValueError: If no PDF documents were found
         """
         print(f"Chunking documents (size={chunk_size}, overlap={chunk_overlap})...")
         
-        if not self.documents:
-            raise ValueError("No documents loaded. Call load_documents() first.")
-        
-        # RecursiveCharacterTextSplitter is best for maintaining semantic meaning
-        # It tries to split on paragraphs, then sentences, then words
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=[
-                "\n\n",  # Split on paragraph breaks first
-                "\n",    # Then single line breaks
-                ". ",    # Then sentences
-                " ",     # Then words
-                ""       # Then characters (last resort)
-            ]
-        )
-        
-        self.chunks = text_splitter.split_documents(self.documents)
-        
-        # Add chunk metadata for better tracking
-        for i, chunk in enumerate(self.chunks):
-            chunk.metadata["chunk_id"] = i
-            chunk.metadata["chunk_size"] = len(chunk.page_content)
+        self.chunks = list(itertools.chain.from_iterable(
+            self.iter_chunks(chunk_size, chunk_overlap)
+        ))
         
+        print(f"✓ Loaded {self.total_pages} document pages")
         print(f"✓ Created {len(self.chunks)} chunks")
         return self.chunks
     
@@ -109,17 +667,16 @@ class NELFUNDDocumentProcessor:
         Returns:
             Dictionary with document statistics
         """
-        if not self.documents:
+        if not self.total_pages:
             return {"error": "No documents loaded"}
         
-        total_chars = sum(len(doc.page_content) for doc in self.documents)
-        
+        total_chars = self.total_chars
         stats = {
-            "total_documents": len(self.documents),
-            "total_chunks": len(self.chunks) if self.chunks else 0,
+            "total_documents": self.total_pages,
+            "total_chunks": len(self.chunks),
             "total_characters": total_chars,
-            "avg_doc_length": total_chars // len(self.documents) if self.documents else 0,
-            "sources": list(set(doc.metadata.get("source", "unknown") for doc in self.documents))
+            "avg_doc_length": total_chars // self.total_pages,
+            "sources": sorted(self.sources)
         }
         
         return stats
@@ -153,10 +710,13 @@ def main():
     # Initialize processor
     processor = NELFUNDDocumentProcessor(data_directory="./data")
     
-    # Load documents
+    # Load and chunk documents
     try:
-        documents = processor.load_documents()
-    except FileNotFoundError as e:
+        chunks = processor.chunk_documents(
+            chunk_size=1000,    # Adjust based on your needs
+            chunk_overlap=200   # Maintains context between chunks
+        )
+    except (FileNotFoundError, ValueError) as e:
         print(f"\nError: {e}")
         print("\nTo fix this:")
         print("   1. Create a 'data' folder in your backend directory")
@@ -164,12 +724,6 @@ def main():
         print("   3. Run this script again\n")
         return
     
-    # Chunk documents
-    chunks = processor.chunk_documents(
-        chunk_size=1000,    # Adjust based on your needs
-        chunk_overlap=200   # Maintains context between chunks
-    )
-    
     # Get statistics
     stats = processor.get_document_stats()
     print("\nDocument Statistics:")
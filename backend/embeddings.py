@@ -0,0 +1,276 @@
+"""
+NELFUND Embedding Backends
+Selects between OpenAI embeddings and a local sentence-transformer model
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from chat_store import open_connection
+
+EMBEDDING_BACKENDS = ("openai", "local")
+DEFAULT_LOCAL_MODEL = "BAAI/bge-small-en-v1.5"
+
+# text-embedding-3 vectors can be shortened (Matryoshka truncation), e.g. 512
+# of 1536 dimensions keeps most of the retrieval quality at a third of the
+# size. The default (0) keeps the full size the shipped chroma_db was built with.
+DEFAULT_EMBEDDING_DIMENSIONS = 0
+
+
+def get_embedding_backend() -> str:
+    """
+    Read the embedding backend from the EMBEDDING_BACKEND environment variable
+    
+    Returns:
+        "openai" (the default) or "local"
+    
+    Raises:
+        ValueError: If the variable names an unknown backend
+    """
+    backend = os.getenv("EMBEDDING_BACKEND", "openai").strip().lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown EMBEDDING_BACKEND '{backend}'. "
+            f"Use one of: {', '.join(EMBEDDING_BACKENDS)}"
+        )
+    return backend
+
+
+def get_embedding_dimensions() -> Optional[int]:
+    """
+    Read the OpenAI embedding size from the EMBEDDING_DIMENSIONS environment variable
+    
+    Returns:
+        Requested number of dimensions, or None (0 in the environment) to
+        keep the model's full size
+    """
+    dimensions = int(os.getenv("EMBEDDING_DIMENSIONS", str(DEFAULT_EMBEDDING_DIMENSIONS)))
+    return dimensions or None
+
+
+def embedding_identity(backend: str, model: str, dimensions: Optional[int] = None) -> str:
+    """
+    Name a vector space, e.g. "openai:text-embedding-3-small@512"
+    
+    Stored in the collection metadata so vectors from different models
+    (or sizes) are never queried against each other.
+    """
+    identity = f"{backend}:{model}"
+    if dimensions:
+        identity += f"@{dimensions}"
+    return identity
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Batched CPU embeddings from a local sentence-transformer model
+    
+    Vectors are L2-normalised, matching the cosine space the collection uses.
+    """
+    
+    def __init__(self, model_name: str = DEFAULT_LOCAL_MODEL, batch_size: int = 64):
+        """
+        Load the model (downloaded on first use)
+        
+        Args:
+            model_name: Hugging Face model id
+            batch_size: Texts encoded per forward pass
+        
+        Raises:
+            ImportError: If sentence-transformers is not installed
+        """
+        # Imported here rather than at module level: it pulls in torch,
+        # which the default OpenAI backend never needs
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "EMBEDDING_BACKEND=local requires sentence-transformers. "
+                "Install it with: pip install sentence-transformers"
+            ) from None
+        
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return vectors.tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Proxy that remembers query embeddings in SQLite
+    
+    Users often retype the same question; the response cache misses when
+    the history differs, but the query vector is the same. Vectors are
+    stored as float16 under a 16-byte BLAKE2b digest of the normalized
+    query, and the least recently used are evicted past max_entries.
+    Document embedding passes straight through.
+    """
+    
+    def __init__(
+        self,
+        inner: Embeddings,
+        db_path: str,
+        embedding_id: str,
+        max_entries: int = 50000
+    ):
+        """
+        Open (or create) the cache
+        
+        Args:
+            inner: Embeddings to call on a miss
+            db_path: Path to the SQLite file backing the cache
+            embedding_id: Vector space of inner (see embedding_identity),
+                part of every key so a model change never reuses old vectors
+            max_entries: Most vectors kept
+        """
+        self._inner = inner
+        self.embedding_id = embedding_id
+        self.max_entries = max_entries
+        
+        self._lock = threading.Lock()
+        self._conn = open_connection(db_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embed_cache (
+                    key BLOB PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    ts REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embed_cache_ts ON embed_cache (ts)")
+    
+    def _key(self, text: str) -> bytes:
+        normalized = " ".join(text.lower().split())
+        raw = f"{self.embedding_id}\n{normalized}".encode("utf-8")
+        return hashlib.blake2b(raw, digest_size=16).digest()
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._inner.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT vector FROM embed_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE embed_cache SET ts = ? WHERE key = ?", (time.time(), key)
+                )
+                return np.frombuffer(row["vector"], dtype=np.float16).astype(np.float32).tolist()
+        
+        vector = self._inner.embed_query(text)
+        
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embed_cache (key, vector, ts) VALUES (?, ?, ?)",
+                (key, np.asarray(vector, dtype=np.float16).tobytes(), time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM embed_cache WHERE key IN "
+                "(SELECT key FROM embed_cache ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        return vector
+
+
+class DocumentEmbeddingCache:
+    """
+    SQLite store of chunk embeddings from earlier vector store builds
+    
+    Keyed on a SHA-256 of the embedding identity and the exact chunk text,
+    so rebuilding the store only pays for chunks that are new or changed.
+    Vectors are kept as float32, exactly as the model returned them.
+    """
+    
+    # Stay under SQLite's limit on bound parameters per statement
+    LOOKUP_BATCH = 900
+    
+    def __init__(self, db_path: str, embedding_id: str):
+        """
+        Open (or create) the cache
+        
+        Args:
+            db_path: Path to the SQLite file backing the cache
+            embedding_id: Vector space of the cached vectors (see embedding_identity)
+        """
+        self.embedding_id = embedding_id
+        self._conn = open_connection(db_path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS doc_embeddings (
+                    key BLOB PRIMARY KEY,
+                    vector BLOB NOT NULL
+                )
+                """
+            )
+    
+    def _key(self, text: str) -> bytes:
+        raw = f"{self.embedding_id}\n{text}".encode("utf-8")
+        return hashlib.sha256(raw).digest()
+    
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached vectors
+        
+        Args:
+            texts: Chunk texts
+        
+        Returns:
+            One float32 vector per text, or None where the text is not cached
+        """
+        keys = [self._key(text) for text in texts]
+        found = {}
+        for start in range(0, len(keys), self.LOOKUP_BATCH):
+            batch = keys[start:start + self.LOOKUP_BATCH]
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM doc_embeddings WHERE key IN ({', '.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            found.update((row["key"], row["vector"]) for row in rows)
+        
+        return [
+            np.frombuffer(found[key], dtype=np.float32) if key in found else None
+            for key in keys
+        ]
+    
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        Store freshly computed vectors
+        
+        Args:
+            texts: Chunk texts
+            vectors: One embedding per text
+        """
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO doc_embeddings (key, vector) VALUES (?, ?)",
+                (
+                    (self._key(text), np.asarray(vector, dtype=np.float32).tobytes())
+                    for text, vector in zip(texts, vectors)
+                )
+            )
+    
+    def close(self) -> None:
+        self._conn.close()
@@ -1,21 +1,29 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
-import chromadb
-from chromadb.config import Settings
+from cachetools import TTLCache
+from chat_store import ChatStore
+from user_store import UserStore
+from telemetry import configure_tracing
 import bcrypt
 import jwt
 from datetime import datetime, timedelta
 import uuid
 import os
+import asyncio
+import orjson
+import sqlite3
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
+configure_tracing()
 
-app = FastAPI(title="NELFUND Navigator API")
+app = FastAPI(title="NELFUND Navigator API", default_response_class=ORJSONResponse)
 
 # CORS Configuration
 app.add_middleware(
@@ -30,14 +38,30 @@ app.add_middleware(
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-# Initialize ChromaDB Client for users and chats
+# Tokens carry no audience/issuer claims, so skip checking them on decode
+JWT_DECODE_OPTIONS = {"verify_aud": False, "verify_iss": False}
+
+# bcrypt work factor for new hashes. 10 rounds keeps a login around a
+# quarter of the CPU time of the library default (12); existing hashes keep
+# the cost they were created with, which bcrypt stores in the hash itself.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "10"))
+
+# Users and chat history live in SQLite (WAL mode, see chat_store.open_connection).
+# Data in the legacy Chroma "users" and "chats" collections is imported
+# once with migrate_users.py.
 # Note: Documents are handled separately by the RAG engine
-chroma_client = chromadb.PersistentClient(path="./chroma_users")
+db_path = os.getenv("CHAT_DB_PATH", "./chat_history.db")
+user_store = UserStore(db_path)
+chat_store = ChatStore(db_path)
 
-# Collections (users and chats only - documents handled by RAG engine)
-users_collection = chroma_client.get_or_create_collection(name="users")
-chats_collection = chroma_client.get_or_create_collection(name="chats")
+if user_store.is_empty() and os.path.exists("./chroma_users"):
+    print("ℹ️  No users yet. To import accounts from ./chroma_users, run: python migrate_users.py")
+
+# email -> user record, so repeat logins skip the database entirely.
+# Only existing users are cached.
+_user_cache = TTLCache(maxsize=10_000, ttl=300)
 
 # Pydantic Models
 class UserRegister(BaseModel):
@@ -53,18 +77,59 @@ class ChatMessage(BaseModel):
     message: str
     session_id: Optional[str] = None
 
-class ChatResponse(BaseModel):
-    response: str
-    sources: List[str]
-    session_id: str
-
 # Helper Functions
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def find_user_by_email(email: str) -> Optional[dict]:
+    """Look up a user record by email, going to the database only on a cache miss"""
+    cached = _user_cache.get(email)
+    if cached is not None:
+        return cached
+    
+    record = user_store.get_by_email(email)
+    if record is None:
+        return None
+    
+    _user_cache[email] = record
+    return record
+
+def _persist_chat(chat_id: str, user_id: str, session_id: str, user_message: str, bot_response: str, timestamp: str, sources: List[str]):
+    """Store a chat exchange; runs as a background task after the response is sent"""
+    try:
+        chat_store.add_chat(
+            chat_id=chat_id,
+            user_id=user_id,
+            session_id=session_id,
+            user_message=user_message,
+            bot_response=bot_response,
+            timestamp=timestamp,
+            sources=sources
+        )
+    except Exception as e:
+        print(f"Warning: Could not store chat: {e}")
+
+def _load_chat_history(user_id: str, session_id: str) -> List[dict]:
+    """Get a session's messages in the role/content form the agent expects"""
+    chat_history = []
+    try:
+        for chat in chat_store.get_session_chats(user_id, session_id):
+            chat_history.append({
+                "role": "user",
+                "content": chat['user_message']
+            })
+            chat_history.append({
+                "role": "assistant",
+                "content": chat['bot_response']
+            })
+    except Exception as e:
+        print(f"Warning: Could not retrieve chat history: {e}")
+        chat_history = []
+    return chat_history
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=7)
@@ -75,50 +140,62 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token from Authorization header"""
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options=JWT_DECODE_OPTIONS)
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-def optional_verify_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Optional[dict]:
+def optional_verify_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[dict]:
     """Optional token verification - returns None if no token provided"""
-    if not credentials:
+    if credentials is None:
         return None
+    return verify_token(credentials)
+
+@app.on_event("startup")
+def load_rag_agent():
+    """Build the RAG agent at boot so an unusable vector store is reported right away"""
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-    except jwt.JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        from rag_engine import get_rag_agent
+        get_rag_agent()
+    except Exception as e:
+        # Auth and history still work; /api/chat returns this error until fixed
+        print(f"⚠️  RAG agent unavailable: {e}")
 
 # User Management Endpoints
 @app.post("/api/auth/register")
 async def register(user: UserRegister):
     try:
         # Check if user exists
-        existing = users_collection.get(where={"email": user.email})
-        if existing['ids']:
+        if find_user_by_email(user.email) is not None:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Create user
         user_id = str(uuid.uuid4())
-        hashed_pw = hash_password(user.password)
-        
-        users_collection.add(
-            ids=[user_id],
-            documents=[user.email],
-            metadatas=[{
-                "email": user.email,
-                "password": hashed_pw,
-                "full_name": user.full_name,
-                "created_at": datetime.utcnow().isoformat()
-            }]
+        # Hashing is CPU-bound; run it off the event loop
+        hashed_pw = await asyncio.get_running_loop().run_in_executor(
+            None, hash_password, user.password
         )
         
+        try:
+            user_store.add_user(
+                user_id=user_id,
+                email=user.email,
+                password=hashed_pw,
+                full_name=user.full_name,
+                created_at=datetime.utcnow().isoformat()
+            )
+        except sqlite3.IntegrityError:
+            # Lost a race with a concurrent registration for this email
+            raise HTTPException(status_code=400, detail="Email already registered")
+        _user_cache[user.email] = {
+            "id": user_id,
+            "email": user.email,
+            "password": hashed_pw,
+            "full_name": user.full_name
+        }
+        
         token = create_access_token({"user_id": user_id, "email": user.email})
         return {
             "token": token,
@@ -137,16 +214,18 @@ async def register(user: UserRegister):
 async def login(user: UserLogin):
     try:
         # Find user
-        results = users_collection.get(where={"email": user.email})
+        user_data = find_user_by_email(user.email)
         
-        if not results['ids']:
+        if user_data is None:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        user_data = results['metadatas'][0]
-        user_id = results['ids'][0]
+        user_id = user_data['id']
         
-        # Verify password
-        if not verify_password(user.password, user_data['password']):
+        # Verify password (CPU-bound, so keep it off the event loop)
+        password_ok = await asyncio.get_running_loop().run_in_executor(
+            None, verify_password, user.password, user_data['password']
+        )
+        if not password_ok:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         token = create_access_token({"user_id": user_id, "email": user.email})
@@ -167,12 +246,11 @@ async def login(user: UserLogin):
 async def get_current_user(payload: dict = Depends(verify_token)):
     try:
         user_id = payload['user_id']
-        results = users_collection.get(ids=[user_id])
+        user_data = user_store.get_by_id(user_id)
         
-        if not results['ids']:
+        if user_data is None:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user_data = results['metadatas'][0]
         return {
             "id": user_id,
             "email": user_data['email'],
@@ -182,20 +260,16 @@ async def get_current_user(payload: dict = Depends(verify_token)):
         raise HTTPException(status_code=500, detail=str(e))
 
 # Chat Endpoints
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat(message: ChatMessage, credentials: HTTPAuthorizationCredentials = Depends(security)):
+@app.post("/api/chat")
+async def chat(
+    message: ChatMessage,
+    background_tasks: BackgroundTasks,
+    payload: dict = Depends(verify_token)
+):
     """Chat endpoint - requires authentication"""
     try:
-        # Verify token to get user_id
-        try:
-            token = credentials.credentials
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id = payload.get('user_id')
-            if not user_id:
-                raise HTTPException(status_code=401, detail="Invalid token")
-        except jwt.ExpiredSignatureError:
-            raise HTTPException(status_code=401, detail="Token expired")
-        except jwt.JWTError:
+        user_id = payload.get('user_id')
+        if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
         
         try:
@@ -210,58 +284,34 @@ async def chat(message: ChatMessage, credentials: HTTPAuthorizationCredentials =
         session_id = message.session_id or str(uuid.uuid4())
         
         # Get chat history for this session
-        chat_history = []
-        try:
-            # Query by session_id (ChromaDB requires single where condition)
-            history_results = chats_collection.get(
-                where={"session_id": session_id}
-            )
-            if history_results['ids']:
-                for i in range(len(history_results['ids'])):
-                    metadata = history_results['metadatas'][i]
-                    # Only add if belongs to same user
-                    if metadata.get('user_id') == user_id:
-                        chat_history.append({
-                            "role": "user",
-                            "content": metadata['user_message']
-                        })
-                        chat_history.append({
-                            "role": "assistant",
-                            "content": metadata['bot_response']
-                        })
-        except Exception as e:
-            print(f"Warning: Could not retrieve chat history: {e}")
-            chat_history = []
+        chat_history = _load_chat_history(user_id, session_id)
         
-        # Use RAG agent to generate response
+        # Use RAG agent to generate response (it reuses cached answers to
+        # repeated questions itself)
         agent = get_rag_agent()
         result = agent.query(message.message, chat_history=chat_history)
         
         response_text = result['response']
         sources = result.get('sources', [])
         
-        # Store chat
-        chat_id = str(uuid.uuid4())
-        try:
-            chats_collection.add(
-                ids=[chat_id],
-                documents=[message.message],
-                metadatas=[{
-                    "user_id": user_id,
-                    "session_id": session_id,
-                    "user_message": message.message,
-                    "bot_response": response_text,
-                    "timestamp": datetime.utcnow().isoformat()
-                }]
-            )
-        except Exception as e:
-            print(f"Warning: Could not store chat: {e}")
-        
-        return ChatResponse(
-            response=response_text,
-            sources=sources,
-            session_id=session_id
+        # Store chat once the response has been sent
+        background_tasks.add_task(
+            _persist_chat,
+            str(uuid.uuid4()),
+            user_id,
+            session_id,
+            message.message,
+            response_text,
+            datetime.utcnow().isoformat(),
+            sources
         )
+        
+        # Plain dict: skips a pydantic validation round-trip on every reply
+        return {
+            "response": response_text,
+            "sources": sources,
+            "session_id": session_id
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -269,30 +319,88 @@ async def chat(message: ChatMessage, credentials: HTTPAuthorizationCredentials =
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
+@app.post("/api/chat/stream")
+async def chat_stream(message: ChatMessage, payload: dict = Depends(verify_token)):
+    """
+    Chat endpoint that streams the reply as Server-Sent Events
+    
+    Each event is a JSON object: {"delta": text} for each piece of the
+    reply, then {"done": true, "sources": [...], "session_id": ...}.
+    """
+    user_id = payload.get('user_id')
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    try:
+        from rag_engine import get_rag_agent
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="RAG engine not initialized. Run: python setup_vectordb.py"
+        )
+    
+    session_id = message.session_id or str(uuid.uuid4())
+    chat_history = _load_chat_history(user_id, session_id)
+    
+    # Filled in while streaming; stored once the response has been sent
+    reply = {"response": "", "sources": []}
+    
+    async def events():
+        try:
+            parts = []
+            agent = get_rag_agent()
+            async for event in agent.aquery(message.message, chat_history=chat_history):
+                if "delta" in event:
+                    parts.append(event["delta"])
+                else:
+                    reply["response"] = "".join(parts)
+                    reply["sources"] = list(event["sources"])
+                yield _sse(event, session_id)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield _sse({"error": f"Chat error: {str(e)}", "done": True}, session_id)
+    
+    def persist():
+        if reply["response"]:
+            _persist_chat(
+                str(uuid.uuid4()),
+                user_id,
+                session_id,
+                message.message,
+                reply["response"],
+                datetime.utcnow().isoformat(),
+                reply["sources"]
+            )
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=BackgroundTask(persist)
+    )
+
+def _sse(event: dict, session_id: str) -> bytes:
+    """Encode one streaming event; the final event also carries the session id"""
+    if event.get("done"):
+        event = {**event, "session_id": session_id}
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
 @app.get("/api/chat/history/{session_id}")
 async def get_session_chat_history(session_id: str, payload: dict = Depends(verify_token)):
     """Get chat history for a specific session (requires auth)"""
     try:
         user_id = payload['user_id']
-        # Query by session_id only
-        results = chats_collection.get(where={"session_id": session_id})
-        
-        chats = []
-        if results['ids']:
-            for i, chat_id in enumerate(results['ids']):
-                metadata = results['metadatas'][i]
-                # Filter by user_id to prevent accessing other users' chats
-                if metadata.get('user_id') == user_id:
-                    chats.append({
-                        "id": chat_id,
-                        "user_message": metadata['user_message'],
-                        "bot_response": metadata['bot_response'],
-                        "sources": metadata.get('sources', []),
-                        "timestamp": metadata['timestamp']
-                    })
-        
-        # Sort by timestamp (oldest first)
-        chats.sort(key=lambda x: x['timestamp'])
+        chats = [
+            {
+                "id": chat['id'],
+                "user_message": chat['user_message'],
+                "bot_response": chat['bot_response'],
+                "sources": chat['sources'],
+                "timestamp": chat['timestamp']
+            }
+            for chat in chat_store.get_session_chats(user_id, session_id)
+        ]
         return {"session_id": session_id, "chats": chats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -301,22 +409,8 @@ async def get_session_chat_history(session_id: str, payload: dict = Depends(veri
 async def get_chat_history(payload: dict = Depends(verify_token)):
     try:
         user_id = payload['user_id']
-        results = chats_collection.get(where={"user_id": user_id})
-        
-        chats = []
-        if results['ids']:
-            for i, chat_id in enumerate(results['ids']):
-                metadata = results['metadatas'][i]
-                chats.append({
-                    "id": chat_id,
-                    "session_id": metadata['session_id'],
-                    "user_message": metadata['user_message'],
-                    "bot_response": metadata['bot_response'],
-                    "timestamp": metadata['timestamp']
-                })
-        
-        # Sort by timestamp
-        chats.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Newest first
+        chats = chat_store.get_user_chats(user_id)
         return {"chats": chats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -325,24 +419,7 @@ async def get_chat_history(payload: dict = Depends(verify_token)):
 async def get_sessions(payload: dict = Depends(verify_token)):
     try:
         user_id = payload['user_id']
-        results = chats_collection.get(where={"user_id": user_id})
-        
-        sessions = {}
-        if results['ids']:
-            for i, chat_id in enumerate(results['ids']):
-                metadata = results['metadatas'][i]
-                session_id = metadata['session_id']
-                
-                if session_id not in sessions:
-                    sessions[session_id] = {
-                        "session_id": session_id,
-                        "first_message": metadata['user_message'][:50],
-                        "timestamp": metadata['timestamp'],
-                        "message_count": 0
-                    }
-                sessions[session_id]['message_count'] += 1
-        
-        return {"sessions": list(sessions.values())}
+        return {"sessions": chat_store.get_sessions(user_id)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -350,10 +427,7 @@ async def get_sessions(payload: dict = Depends(verify_token)):
 async def delete_session(session_id: str, payload: dict = Depends(verify_token)):
     try:
         user_id = payload['user_id']
-        results = chats_collection.get(where={"user_id": user_id, "session_id": session_id})
-        
-        if results['ids']:
-            chats_collection.delete(ids=results['ids'])
+        chat_store.delete_session(user_id, session_id)
         
         return {"message": "Session deleted successfully"}
     except Exception as e:
@@ -0,0 +1,70 @@
+"""
+ONE-TIME MIGRATION SCRIPT
+Copy users and chat history from the legacy ChromaDB store into SQLite
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+from chat_store import ChatStore
+from user_store import UserStore
+
+# Load environment variables
+load_dotenv()
+
+LEGACY_STORE_PATH = "./chroma_users"
+
+
+def migrate(legacy_path: str, db_path: str) -> bool:
+    """
+    Import the legacy "users" and "chats" collections
+    
+    Only empty tables are filled, and rows are inserted with INSERT OR
+    IGNORE, so running the script again is harmless.
+    
+    Args:
+        legacy_path: Directory of the legacy ChromaDB store
+        db_path: SQLite database used by the API server
+    
+    Returns:
+        True if the data was migrated (or there was nothing to migrate)
+    """
+    user_store = UserStore(db_path)
+    chat_store = ChatStore(db_path)
+    
+    if not (user_store.is_empty() or chat_store.is_empty()):
+        print(f"✓ {db_path} already holds users and chats, nothing to migrate")
+        return True
+    if not os.path.exists(legacy_path):
+        print(f"✓ No legacy store at {legacy_path}, nothing to migrate")
+        return True
+    
+    try:
+        import chromadb
+        
+        chroma_client = chromadb.PersistentClient(path=legacy_path)
+        if user_store.is_empty():
+            users_collection = chroma_client.get_or_create_collection(name="users")
+            imported = user_store.import_from_chroma(users_collection)
+            print(f"✓ Migrated {imported} users from ChromaDB to {db_path}")
+        if chat_store.is_empty():
+            chats_collection = chroma_client.get_or_create_collection(name="chats")
+            imported = chat_store.import_from_chroma(chats_collection)
+            print(f"✓ Migrated {imported} chats from ChromaDB to {db_path}")
+    except Exception as e:
+        print(f"❌ Could not migrate {legacy_path}: {type(e).__name__}: {e}")
+        return False
+    
+    return True
+
+
+def main():
+    """Main entry point"""
+    db_path = os.getenv("CHAT_DB_PATH", "./chat_history.db")
+    if not migrate(LEGACY_STORE_PATH, db_path):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
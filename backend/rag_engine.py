@@ -4,17 +4,90 @@ Uses LangGraph for intelligent document retrieval and response generation
 """
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema import HumanMessage, AIMessage
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, List, Optional
+from typing import AsyncIterator, TypedDict, List, Optional
 import os
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PureWindowsPath
 from dotenv import load_dotenv
+import chromadb
+from opentelemetry import trace
+from response_cache import ResponseCache
+from retrieval import (
+    EmbeddingMatrix,
+    FaissIndex,
+    KeywordIndex,
+    maximal_marginal_relevance,
+    reciprocal_rank_fusion
+)
+from embeddings import (
+    DEFAULT_LOCAL_MODEL,
+    CachedEmbeddings,
+    LocalEmbeddings,
+    embedding_identity,
+    get_embedding_backend,
+    get_embedding_dimensions
+)
 
 # Load environment variables
 load_dotenv()
 
+RAG_SYSTEM_PROMPT = """You are a helpful AI assistant for NELFUND (Nigerian Education Loan Fund).
+
+Your role is to help Nigerian students understand:
+- Eligibility requirements for student loans
+- Application process and required documentation
+- Repayment terms and conditions
+- Covered institutions and courses
+- Any other NELFUND-related queries
+
+IMPORTANT RULES:
+1. ONLY use information from the context provided with the question
+2. If the answer isn't in the context, say "I don't have that specific information in the NELFUND documents I have access to. I recommend visiting the official NELFUND website at nelfund.gov.ng for the most current information."
+3. Be clear, friendly, and encouraging to students
+4. Always cite your sources when providing information
+5. Break down complex information into simple, easy-to-understand terms
+6. Use Nigerian context and examples when helpful
+
+Remember: Your goal is to empower Nigerian students with accurate information about accessing higher education funding."""
+
+# Retrieved passages go in their own message after the history, so every
+# request shares the same system-prompt prefix and the provider can cache it
+RAG_CONTEXT_TEMPLATE = """Context from NELFUND documents:
+{context}"""
+
+# Routes RAG requests to the same OpenAI prompt-cache shard; bump the
+# version whenever RAG_SYSTEM_PROMPT changes
+RAG_PROMPT_CACHE_KEY = "nelfund-rag-v1"
+
+CHITCHAT_SYSTEM_PROMPT = """You are a friendly AI assistant for NELFUND (Nigerian Education Loan Fund).
+
+For greetings and simple interactions:
+- Respond warmly and professionally
+- Offer to help with NELFUND-related questions
+- Be encouraging and supportive to students
+- Keep responses brief and friendly"""
+
+# Number of trailing history messages the agent sees (last 3 exchanges)
+HISTORY_WINDOW = 6
+
+# Corpora up to this many chunks are searched by brute force over the
+# memory-mapped embedding matrix; larger ones use a FAISS index if setup
+# built one, otherwise Chroma's HNSW index
+BRUTEFORCE_MAX_VECTORS = int(os.getenv("BRUTEFORCE_MAX_VECTORS", "200000"))
+
+# Document questions get the stronger model; greetings and small talk go
+# to a much cheaper, faster one
+RAG_MODEL = os.getenv("RAG_MODEL", "gpt-4o")
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
+
+
 # State Type for LangGraph
 class AgentState(TypedDict):
     messages: List
@@ -23,6 +96,9 @@ class AgentState(TypedDict):
     retrieved_docs: List[str]
     response: str
     sources: List[str]
+    query_embedding: Optional[List[float]]
+    keyword_hits: List[dict]
+    cache_hit: bool
 
 
 class NELFUNDRAGAgent:
@@ -39,7 +115,7 @@ class NELFUNDRAGAgent:
         """
         self.persist_directory = persist_directory
         
-        # Initialize LLM
+        # Initialize LLMs
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError(
@@ -47,30 +123,95 @@ class NELFUNDRAGAgent:
                 "Please add it: OPENAI_API_KEY=sk-your-key-here"
             )
         
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview",
+        self.llm_rag = ChatOpenAI(
+            model=RAG_MODEL,
             temperature=0.3,
-            openai_api_key=api_key
+            openai_api_key=api_key,
+            model_kwargs={"extra_body": {"prompt_cache_key": RAG_PROMPT_CACHE_KEY}}
         )
-        
-        # Initialize embeddings
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
+        self.llm_chat = ChatOpenAI(
+            model=CHAT_MODEL,
+            temperature=0.5,
             openai_api_key=api_key
         )
         
+        # Initialize embeddings (EMBEDDING_BACKEND=local runs them on CPU)
+        if get_embedding_backend() == "local":
+            self.embeddings = LocalEmbeddings(DEFAULT_LOCAL_MODEL)
+            self.embedding_id = embedding_identity("local", DEFAULT_LOCAL_MODEL)
+        else:
+            dimensions = get_embedding_dimensions()
+            self.embeddings = OpenAIEmbeddings(
+                model="text-embedding-3-small",
+                dimensions=dimensions,
+                openai_api_key=api_key
+            )
+            self.embedding_id = embedding_identity("openai", "text-embedding-3-small", dimensions)
+        
         # Load vector store
-        self.vectorstore = self._load_vectorstore()
+        self.collection = self._load_vectorstore()
+        self.ann_index: Optional[FaissIndex] = None
+        self.matrix = self._load_matrix()
+        
+        # Repeated questions reuse their query vector instead of calling
+        # the embedding model again
+        self.embeddings = CachedEmbeddings(
+            self.embeddings,
+            os.path.join(self.persist_directory, "embed_cache.sqlite"),
+            self.embedding_id
+        )
+        
+        # BM25 index over the same chunks, if the store was built with one.
+        # Text search needs no embedding, so it runs alongside embed_query.
+        self.keyword_index = KeywordIndex.load(self.persist_directory)
+        self._keyword_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="keyword-search")
+        
+        # Prompts and chains are fixed, so build them once rather than per query
+        self._rag_prompt = ChatPromptTemplate.from_messages([
+            ("system", RAG_SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("human", RAG_CONTEXT_TEMPLATE),
+            ("human", "{query}")
+        ])
+        self._chitchat_prompt = ChatPromptTemplate.from_messages([
+            ("system", CHITCHAT_SYSTEM_PROMPT),
+            ("human", "{query}")
+        ])
+        self._rag_chain = self._rag_prompt | self.llm_rag
+        self._chitchat_chain = self._chitchat_prompt | self.llm_chat
+        
+        # Greetings and simple queries don't need retrieval. Word boundaries
+        # keep words like "this" or "which" from matching "hi".
+        self._greet_re = re.compile(
+            r"\b(hello|hi|hey|good (?:morning|afternoon|evening)|thanks|thank you"
+            r"|bye|goodbye|how are you|what'?s up|what can you do)\b",
+            re.IGNORECASE
+        )
+        
+        # Answers to repeated or near-identical questions. Tied to the
+        # collection's id, which changes whenever the documents are rebuilt,
+        # so a reindex discards them.
+        self.response_cache = ResponseCache(
+            os.path.join(self.persist_directory, "response_cache.db"),
+            index_id=str(self.collection.id)
+        )
+        
+        # Spans per graph node; no-ops unless telemetry.configure_tracing()
+        # installed an exporter
+        self._tracer = trace.get_tracer("nelfund.rag")
         
         # Build LangGraph workflow
         self.graph = self._build_graph()
     
-    def _load_vectorstore(self) -> Chroma:
+    def _load_vectorstore(self) -> chromadb.Collection:
         """
         Load the vector store from disk
         
+        Queries go straight to the chromadb collection; the query embedding
+        is computed by the agent, so no LangChain wrapper is needed.
+        
         Returns:
-            Chroma vector store instance
+            ChromaDB collection of document chunks
         """
         if not os.path.exists(self.persist_directory):
             print(f"Warning: Vector store not found at {self.persist_directory}")
@@ -80,14 +221,52 @@ class NELFUNDRAGAgent:
                 f"Vector store not found. Run setup first."
             )
         
-        vectorstore = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings,
-            collection_name="nelfund_docs"
-        )
+        self._client = chromadb.PersistentClient(path=self.persist_directory)
+        collection = self._client.get_or_create_collection(name="nelfund_docs")
+        
+        # Querying with a different model's vectors returns nonsense (or
+        # fails on a dimension mismatch), so refuse to start instead. Stores
+        # that predate the identity record are refused too: nothing says
+        # which model or size built them.
+        stored_id = (collection.metadata or {}).get("embedding")
+        if stored_id != self.embedding_id:
+            if stored_id:
+                built_with = f"{stored_id} embeddings"
+            else:
+                sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+                size = f"{len(sample[0])}-dimension " if sample is not None and len(sample) else ""
+                built_with = f"unrecorded {size}embeddings"
+            raise ValueError(
+                f"Vector store at {self.persist_directory} was built with "
+                f"{built_with} but this agent uses {self.embedding_id}. "
+                "Rebuild the vector store with: python setup_vectordb.py "
+                "(or set EMBEDDING_BACKEND and EMBEDDING_DIMENSIONS to match)"
+            )
         
         print(f"✓ Vector store loaded from {self.persist_directory}")
-        return vectorstore
+        return collection
+    
+    def _load_matrix(self) -> Optional[EmbeddingMatrix]:
+        """
+        Memory-map the embedding matrix written at setup, if usable
+        
+        Large corpora also need the FAISS index (set as self.ann_index).
+        
+        Returns:
+            EmbeddingMatrix, or None to search through Chroma instead
+        """
+        matrix = EmbeddingMatrix.load(self.persist_directory, self.embedding_id)
+        if matrix is None:
+            return None
+        if len(matrix) > BRUTEFORCE_MAX_VECTORS:
+            self.ann_index = FaissIndex.load(self.persist_directory, matrix)
+            if self.ann_index is None:
+                return None
+            print(f"✓ Memory-mapped FAISS index over {len(matrix)} embeddings")
+            return matrix
+        
+        print(f"✓ Memory-mapped {len(matrix)} embeddings for brute-force search")
+        return matrix
     
     def _classify_query(self, state: AgentState) -> AgentState:
         """
@@ -95,129 +274,151 @@ class NELFUNDRAGAgent:
         
         This is the "agentic" part - deciding when to retrieve
         """
-        query = state["query"].lower().strip()
-        
-        # Greetings and simple queries don't need retrieval
-        no_retrieval_patterns = [
-            "hello", "hi", "hey", "good morning", "good afternoon", 
-            "good evening", "thanks", "thank you", "bye", "goodbye",
-            "how are you", "what's up", "what can you do"
-        ]
-        
-        # Check if query is just a greeting
-        if any(pattern in query for pattern in no_retrieval_patterns):
-            state["needs_retrieval"] = False
-        else:
-            # For substantive questions, retrieve documents
-            state["needs_retrieval"] = True
+        with self._tracer.start_as_current_span("classify") as span:
+            span.set_attribute("query.len", len(state["query"]))
+            
+            # Greetings skip retrieval; substantive questions retrieve documents
+            state["needs_retrieval"] = self._greet_re.search(state["query"]) is None
+            span.set_attribute("needs_retrieval", state["needs_retrieval"])
         
         return state
     
-    def _retrieve_documents(self, state: AgentState) -> AgentState:
+    def _cache_lookup(self, state: AgentState) -> AgentState:
         """
-        Retrieve relevant documents from vector store
-        """
-        if not state["needs_retrieval"]:
-            return state
+        Reuse a cached answer for the same (or a near-identical) question
         
+        Exact matches are checked first so they cost no embedding call. On a
+        miss, substantive queries are embedded once here; the semantic lookup
+        and retrieval both use that vector. The keyword search for retrieval
+        runs in a worker thread while the embedding request is in flight.
+        """
         query = state["query"]
-        
-        # Retrieve top 4 most relevant chunks with scores
-        results = self.vectorstore.similarity_search_with_score(query, k=4)
-        
-        # Extract content and sources
-        state["retrieved_docs"] = [doc.page_content for doc, score in results]
-        
-        # Extract unique sources from metadata
-        sources = []
-        for doc, score in results:
-            source = doc.metadata.get("source", "Unknown Document")
-            # Extract just the filename
-            if "/" in source or "\\" in source:
-                source = os.path.basename(source)
-            if source not in sources:
-                sources.append(source)
-        
-        state["sources"] = sources
+        messages = [msg.content for msg in state["messages"]]
+        
+        with self._tracer.start_as_current_span("cache_lookup") as span:
+            cached = self.response_cache.get(query, messages)
+            if cached is None and state["needs_retrieval"]:
+                keyword_search = None
+                if self.keyword_index is not None:
+                    keyword_search = self._keyword_pool.submit(self.keyword_index.search, query, 4)
+                
+                with self._tracer.start_as_current_span("embed_query"):
+                    state["query_embedding"] = self.embeddings.embed_query(query)
+                if keyword_search is not None:
+                    state["keyword_hits"] = keyword_search.result()
+                cached = self.response_cache.get(query, messages, state["query_embedding"])
+            
+            if cached is not None:
+                state["response"] = cached["response"]
+                state["sources"] = cached["sources"]
+                state["cache_hit"] = True
+            span.set_attribute("cache.hit", state["cache_hit"])
         
         return state
     
-    def _generate_response(self, state: AgentState) -> AgentState:
+    def _retrieve_documents(self, state: AgentState) -> AgentState:
         """
-        Generate response using LLM
+        Retrieve relevant documents from vector store
         """
-        query = state["query"]
-        messages = state.get("messages", [])
+        if not state["needs_retrieval"]:
+            return state
         
-        if state["needs_retrieval"]:
-            # RAG response with retrieved context
-            context = "\n\n".join(state["retrieved_docs"])
+        with self._tracer.start_as_current_span("retrieve") as span:
+            span.set_attribute("retrieval.k", 4)
+            span.set_attribute("retrieval.fetch_k", 12)
+            if self.ann_index is not None:
+                span.set_attribute("retrieval.backend", "faiss")
+            else:
+                span.set_attribute("retrieval.backend", "matrix" if self.matrix is not None else "chroma")
+            started = time.perf_counter()
             
-            system_prompt = """You are a helpful AI assistant for NELFUND (Nigerian Education Loan Fund).
-
-Your role is to help Nigerian students understand:
-- Eligibility requirements for student loans
-- Application process and required documentation
-- Repayment terms and conditions
-- Covered institutions and courses
-- Any other NELFUND-related queries
-
-IMPORTANT RULES:
-1. ONLY use information from the provided context below
-2. If the answer isn't in the context, say "I don't have that specific information in the NELFUND documents I have access to. I recommend visiting the official NELFUND website at nelfund.gov.ng for the most current information."
-3. Be clear, friendly, and encouraging to students
-4. Always cite your sources when providing information
-5. Break down complex information into simple, easy-to-understand terms
-6. Use Nigerian context and examples when helpful
-
-Context from NELFUND documents:
-{context}
-
-Remember: Your goal is to empower Nigerian students with accurate information about accessing higher education funding."""
-
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{query}")
-            ])
+            # Fetch the 12 nearest chunks, reusing the embedding computed during
+            # the cache lookup, then keep the 4 that best balance relevance and
+            # diversity (overlapping chunks otherwise tend to fill the context
+            # with near-duplicates)
+            if self.matrix is not None:
+                searcher = self.ann_index or self.matrix
+                rows, _ = searcher.search(state["query_embedding"], k=12)
+                candidates = self.matrix.rows(rows)
+                ids = [self.matrix.ids[i] for i in rows]
+                documents = [self.matrix.documents[i] for i in rows]
+                metadatas = [self.matrix.metadatas[i] for i in rows]
+            else:
+                results = self.collection.query(
+                    query_embeddings=[state["query_embedding"]],
+                    n_results=12,
+                    include=["embeddings", "documents", "metadatas"]
+                )
+                candidates = results["embeddings"][0]
+                ids = results["ids"][0]
+                documents = results["documents"][0]
+                metadatas = results["metadatas"][0]
             
-            # Convert message history to proper format
-            chat_history = []
-            for msg in messages[-6:]:  # Last 3 exchanges (6 messages)
-                if msg.get("role") == "user":
-                    chat_history.append(HumanMessage(content=msg["content"]))
-                elif msg.get("role") == "assistant":
-                    chat_history.append(AIMessage(content=msg["content"]))
+            selected = maximal_marginal_relevance(
+                state["query_embedding"], candidates, k=4, lambda_mult=0.5
+            )
+            chunks = {ids[i]: (documents[i], metadatas[i]) for i in selected}
             
-            # Generate response
-            chain = prompt | self.llm
-            response = chain.invoke({
-                "context": context,
-                "chat_history": chat_history,
-                "query": query
-            })
+            # Merge with the keyword matches by reciprocal-rank fusion, so chunks
+            # found by both searches rank first, and keep the top 4
+            for hit in state["keyword_hits"]:
+                chunks.setdefault(hit["id"], (hit["document"], hit["metadata"]))
+            ranked = reciprocal_rank_fusion([
+                [ids[i] for i in selected],
+                [hit["id"] for hit in state["keyword_hits"]]
+            ])[:4]
             
-            state["response"] = response.content
+            # Extract content and sources
+            state["retrieved_docs"] = [chunks[chunk_id][0] for chunk_id in ranked]
             
-        else:
-            # Simple response without retrieval
-            system_prompt = """You are a friendly AI assistant for NELFUND (Nigerian Education Loan Fund).
-
-For greetings and simple interactions:
-- Respond warmly and professionally
-- Offer to help with NELFUND-related questions
-- Be encouraging and supportive to students
-- Keep responses brief and friendly"""
-
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                ("human", "{query}")
-            ])
+            # Unique source filenames, in ranking order. PureWindowsPath splits on
+            # both "/" and "\\", so paths from either OS reduce to the filename.
+            state["sources"] = list(dict.fromkeys(
+                PureWindowsPath((chunks[chunk_id][1] or {}).get("source", "Unknown Document")).name
+                for chunk_id in ranked
+            ))
             
-            chain = prompt | self.llm
-            response = chain.invoke({"query": query})
+            span.set_attribute("retrieval.keyword_hits", len(state["keyword_hits"]))
+            span.set_attribute("retrieval.sources", len(state["sources"]))
+            span.set_attribute("retrieval.elapsed_ms", (time.perf_counter() - started) * 1000)
+        
+        return state
+    
+    def _chain_inputs(self, state: AgentState):
+        """
+        Pick the chain for this query and the inputs to invoke it with
+        
+        Returns:
+            Tuple of (chain, input dictionary)
+        """
+        if state["needs_retrieval"]:
+            # RAG response with retrieved context; history was trimmed and
+            # converted in _initial_state()
+            return self._rag_chain, {
+                "context": "\n\n".join(state["retrieved_docs"]),
+                "chat_history": state["messages"],
+                "query": state["query"]
+            }
+        
+        # Simple response without retrieval
+        return self._chitchat_chain, {"query": state["query"]}
+    
+    def _generate_response(self, state: AgentState) -> AgentState:
+        """
+        Generate response using LLM
+        """
+        with self._tracer.start_as_current_span("generate") as span:
+            chain, inputs = self._chain_inputs(state)
+            span.set_attribute("llm.model", RAG_MODEL if state["needs_retrieval"] else CHAT_MODEL)
+            response = chain.invoke(inputs)
             
-            state["response"] = response.content
+            usage = response.response_metadata.get("token_usage") or {}
+            for name in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                if name in usage:
+                    span.set_attribute(f"llm.{name}", usage[name])
+        
+        state["response"] = response.content
+        if not state["needs_retrieval"]:
             state["sources"] = []
         
         return state
@@ -226,24 +427,66 @@ For greetings and simple interactions:
         """
         Build the LangGraph workflow
         
-        Flow: Classify → Retrieve (conditional) → Generate
+        Flow: Classify → Cache lookup → Retrieve (conditional) → Generate
         """
         # Create graph
         workflow = StateGraph(AgentState)
         
         # Add nodes
         workflow.add_node("classify", self._classify_query)
+        workflow.add_node("cache_lookup", self._cache_lookup)
         workflow.add_node("retrieve", self._retrieve_documents)
         workflow.add_node("generate", self._generate_response)
         
         # Define edges
         workflow.set_entry_point("classify")
-        workflow.add_edge("classify", "retrieve")
+        workflow.add_edge("classify", "cache_lookup")
+        workflow.add_conditional_edges(
+            "cache_lookup",
+            lambda state: "hit" if state["cache_hit"] else "miss",
+            {"hit": END, "miss": "retrieve"}
+        )
         workflow.add_edge("retrieve", "generate")
         workflow.add_edge("generate", END)
         
         return workflow.compile()
     
+    def _initial_state(self, user_query: str, chat_history: Optional[List[dict]]) -> AgentState:
+        """Build the starting graph state for a question"""
+        # Only the last few messages reach the prompt, so trim and convert
+        # them once here rather than carrying the full history through the graph
+        messages = []
+        for msg in (chat_history or [])[-HISTORY_WINDOW:]:
+            if msg.get("role") == "user":
+                messages.append(HumanMessage(content=msg["content"]))
+            elif msg.get("role") == "assistant":
+                messages.append(AIMessage(content=msg["content"]))
+        
+        return {
+            "messages": messages,
+            "query": user_query,
+            "needs_retrieval": True,
+            "retrieved_docs": [],
+            "response": "",
+            "sources": [],
+            "query_embedding": None,
+            "keyword_hits": [],
+            "cache_hit": False
+        }
+    
+    def _remember(self, state: AgentState) -> None:
+        """Write a freshly generated answer back to the response cache"""
+        if state["cache_hit"]:
+            return
+        
+        self.response_cache.put(
+            state["query"],
+            [msg.content for msg in state["messages"]],
+            state["query_embedding"],
+            state["response"],
+            state["sources"]
+        )
+    
     def query(self, user_query: str, chat_history: Optional[List[dict]] = None) -> dict:
         """
         Main query method - process user question through the agent
@@ -255,28 +498,88 @@ For greetings and simple interactions:
         Returns:
             Dictionary with response, sources, and metadata
         """
-        # Initialize state
-        initial_state = {
-            "messages": chat_history or [],
-            "query": user_query,
-            "needs_retrieval": True,
-            "retrieved_docs": [],
-            "response": "",
-            "sources": []
-        }
+        initial_state = self._initial_state(user_query, chat_history)
         
         # Run through LangGraph workflow
-        result = self.graph.invoke(initial_state)
+        with self._tracer.start_as_current_span("rag.query"):
+            result = self.graph.invoke(initial_state)
+            self._remember(result)
         
         return {
             "response": result["response"],
             "sources": result["sources"],
             "needs_retrieval": result["needs_retrieval"]
         }
+    
+    async def aquery(
+        self,
+        user_query: str,
+        chat_history: Optional[List[dict]] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Stream the answer to a question as it is generated
+        
+        Classification, cache lookup and retrieval run first (in a worker
+        thread, as they make blocking calls); the completion is then streamed.
+        
+        Args:
+            user_query: User's question
+            chat_history: Previous conversation messages
+            
+        Yields:
+            {"delta": text} for each piece of the response, then a final
+            {"done": True, "sources": [...], "needs_retrieval": bool}
+        """
+        state = self._initial_state(user_query, chat_history)
+        
+        # Spans are started explicitly rather than made current: the
+        # generator may be resumed in another context after each yield.
+        # use_span() is only held across the thread hop, which has no yield.
+        root = self._tracer.start_span("rag.aquery")
+        try:
+            with trace.use_span(root):
+                state = await asyncio.to_thread(self._prepare, state)
+            
+            if state["cache_hit"]:
+                yield {"delta": state["response"]}
+            else:
+                chain, inputs = self._chain_inputs(state)
+                parts = []
+                span = self._tracer.start_span("generate", context=trace.set_span_in_context(root))
+                span.set_attribute("llm.model", RAG_MODEL if state["needs_retrieval"] else CHAT_MODEL)
+                try:
+                    async for chunk in chain.astream(inputs):
+                        if chunk.content:
+                            parts.append(chunk.content)
+                            yield {"delta": chunk.content}
+                finally:
+                    span.end()
+                
+                state["response"] = "".join(parts)
+                if not state["needs_retrieval"]:
+                    state["sources"] = []
+                await asyncio.to_thread(self._remember, state)
+        finally:
+            root.end()
+        
+        yield {
+            "done": True,
+            "sources": state["sources"],
+            "needs_retrieval": state["needs_retrieval"]
+        }
+    
+    def _prepare(self, state: AgentState) -> AgentState:
+        """Run the graph's steps up to generation (streaming path)"""
+        state = self._classify_query(state)
+        state = self._cache_lookup(state)
+        if not state["cache_hit"]:
+            state = self._retrieve_documents(state)
+        return state
 
 
 # Singleton instance
 _agent_instance: Optional[NELFUNDRAGAgent] = None
+_agent_lock = threading.Lock()
 
 
 def get_rag_agent() -> NELFUNDRAGAgent:
@@ -289,9 +592,12 @@ def get_rag_agent() -> NELFUNDRAGAgent:
     global _agent_instance
     
     if _agent_instance is None:
-        print("Initializing NELFUND RAG Agent...")
-        _agent_instance = NELFUNDRAGAgent()
-        print("✓ RAG Agent ready!")
+        # Concurrent first requests would otherwise each build an agent
+        with _agent_lock:
+            if _agent_instance is None:
+                print("Initializing NELFUND RAG Agent...")
+                _agent_instance = NELFUNDRAGAgent()
+                print("✓ RAG Agent ready!")
     
     return _agent_instance
 
@@ -0,0 +1,273 @@
+"""
+NELFUND Response Cache
+Two-tier cache for agent answers: exact query match, then embedding similarity
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import orjson
+
+from chat_store import open_connection
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of agent answers, persisted to SQLite
+    
+    Exact hits are keyed on the normalized query plus the recent history
+    (the text of each message).
+    On an exact miss, the query embedding is compared against every live
+    cached embedding of the same size and history in a single matrix-vector
+    product, and the closest answer is reused if its cosine similarity is
+    high enough.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int = 1024,
+        ttl: float = 3600,
+        similarity_threshold: float = 0.95,
+        history_window: int = 6,
+        index_id: Optional[str] = None
+    ):
+        """
+        Open the cache and load the entries that have not expired yet
+        
+        Args:
+            db_path: Path to the SQLite file backing the cache
+            max_entries: Most answers kept before evicting the least recently used
+            ttl: Seconds an answer stays valid
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            history_window: Number of trailing history messages in the key
+            index_id: Identifies the document index the answers come from;
+                answers cached against any other index are discarded
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.history_window = history_window
+        self.index_id = index_id
+        
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # Stacked embeddings for the semantic tier, per embedding size
+        # (entries from an earlier model may differ); rebuilt after any change
+        self._index = None
+        
+        self._conn = open_connection(db_path)
+        self._create_schema()
+        self._load()
+    
+    def _create_schema(self) -> None:
+        """Create the cache tables"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    history_key TEXT NOT NULL,
+                    embedding BLOB,
+                    response TEXT NOT NULL,
+                    sources TEXT NOT NULL,
+                    ts REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache_meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+    
+    def _load(self) -> None:
+        """Drop expired (or other-index) rows and read the most recent ones into memory"""
+        cutoff = time.time() - self.ttl
+        with self._lock, self._conn:
+            # Rebuilding the documents gives the index a new id, so answers
+            # from before a reindex are never served
+            if self.index_id is not None:
+                row = self._conn.execute(
+                    "SELECT value FROM response_cache_meta WHERE key = 'index_id'"
+                ).fetchone()
+                if row is None or row["value"] != self.index_id:
+                    self._conn.execute("DELETE FROM response_cache")
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO response_cache_meta (key, value) VALUES ('index_id', ?)",
+                        (self.index_id,)
+                    )
+            self._conn.execute("DELETE FROM response_cache WHERE ts < ?", (cutoff,))
+            rows = self._conn.execute(
+                "SELECT cache_key, history_key, embedding, response, sources, ts "
+                "FROM response_cache ORDER BY ts DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+            
+            for row in reversed(rows):
+                embedding = None
+                if row["embedding"] is not None:
+                    embedding = np.frombuffer(row["embedding"], dtype=np.float32)
+                self._entries[row["cache_key"]] = {
+                    "history_key": row["history_key"],
+                    "embedding": embedding,
+                    "response": row["response"],
+                    "sources": orjson.loads(row["sources"]),
+                    "ts": row["ts"]
+                }
+    
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lowercase and collapse whitespace so trivial variations share a key"""
+        return re.sub(r"\s+", " ", query.lower()).strip()
+    
+    @staticmethod
+    def _digest(value) -> str:
+        raw = json.dumps(value, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def _keys(self, query: str, chat_history: List[str]):
+        """Exact key for the query and history, plus a key for the history alone"""
+        history = chat_history[-self.history_window:]
+        return (
+            self._digest({"q": self.normalize(query), "hist": history}),
+            self._digest(history)
+        )
+    
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _semantic_index(self, dimensions: int):
+        """Return (keys, embedding matrix, history keys, timestamps) for embeddings of one size"""
+        if self._index is None:
+            self._index = {}
+        if dimensions not in self._index:
+            keys = [
+                key for key, entry in self._entries.items()
+                if entry["embedding"] is not None and len(entry["embedding"]) == dimensions
+            ]
+            if keys:
+                matrix = np.stack([self._entries[key]["embedding"] for key in keys])
+            else:
+                matrix = np.zeros((0, dimensions), dtype=np.float32)
+            histories = np.array([self._entries[key]["history_key"] for key in keys], dtype=str)
+            timestamps = np.array([self._entries[key]["ts"] for key in keys], dtype=np.float64)
+            self._index[dimensions] = (keys, matrix, histories, timestamps)
+        return self._index[dimensions]
+    
+    def _remove(self, key: str) -> None:
+        """Forget an entry in memory and on disk (caller holds the lock)"""
+        self._entries.pop(key, None)
+        self._index = None
+        with self._conn:
+            self._conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (key,))
+    
+    def get(
+        self,
+        query: str,
+        chat_history: List[str],
+        embedding: Optional[List[float]] = None
+    ) -> Optional[dict]:
+        """
+        Look up a cached answer for a query
+        
+        Args:
+            query: User's question
+            chat_history: Text of the conversation's messages, oldest first
+            embedding: Query embedding, enabling the semantic tier
+        
+        Returns:
+            Dictionary with response and sources, or None on a miss
+        """
+        exact_key, history_key = self._keys(query, chat_history)
+        now = time.time()
+        
+        with self._lock:
+            key = exact_key if exact_key in self._entries else None
+            if key is not None and now - self._entries[key]["ts"] > self.ttl:
+                self._remove(key)
+                key = None
+            
+            if key is None and embedding is not None:
+                keys, matrix, histories, timestamps = self._semantic_index(len(embedding))
+                if keys:
+                    scores = matrix @ self._unit(embedding)
+                    # Only live answers given with the same history can match
+                    scores[(histories != history_key) | (now - timestamps > self.ttl)] = -1.0
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold:
+                        key = keys[best]
+            
+            if key is None:
+                return None
+            
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            return {"response": entry["response"], "sources": list(entry["sources"])}
+    
+    def put(
+        self,
+        query: str,
+        chat_history: List[str],
+        embedding: Optional[List[float]],
+        response: str,
+        sources: List[str]
+    ) -> None:
+        """
+        Store an answer, evicting the least recently used entries if full
+        
+        Args:
+            query: User's question
+            chat_history: Text of the conversation's messages, oldest first
+            embedding: Query embedding, or None if the query was not embedded
+            response: Generated answer
+            sources: Documents cited in the answer
+        """
+        exact_key, history_key = self._keys(query, chat_history)
+        vector = self._unit(embedding) if embedding is not None else None
+        entry = {
+            "history_key": history_key,
+            "embedding": vector,
+            "response": response,
+            "sources": list(sources),
+            "ts": time.time()
+        }
+        
+        with self._lock:
+            self._entries.pop(exact_key, None)
+            self._entries[exact_key] = entry
+            self._index = None
+            
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO response_cache "
+                    "(cache_key, history_key, embedding, response, sources, ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        exact_key,
+                        history_key,
+                        vector.tobytes() if vector is not None else None,
+                        response,
+                        orjson.dumps(entry["sources"]).decode("utf-8"),
+                        entry["ts"]
+                    )
+                )
+            
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+    
+    def clear(self) -> None:
+        """Remove every cached answer"""
+        with self._lock, self._conn:
+            self._entries.clear()
+            self._index = None
+            self._conn.execute("DELETE FROM response_cache")
@@ -0,0 +1,510 @@
+"""
+NELFUND Retrieval Helpers
+Numpy search and re-ranking shared by the vector store and the RAG agent
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+try:
+    # Optional: SIMD float16 dot products for brute-force search
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# Written next to the Chroma files when the store is built
+VECTORS_FILE = "vectors.f16.npy"
+INT8_VECTORS_FILE = "vectors.i8.npy"
+INT8_SCALES_FILE = "vectors.scales.npy"
+CHUNKS_FILE = "chunks.json"
+FAISS_INDEX_FILE = "vectors.faiss"
+KEYWORD_INDEX_FILE = "keyword_index.db"
+
+# float16 halves the float32 matrix; int8 (one float32 scale per row)
+# quarters it, at a small further cost in score precision
+MATRIX_QUANTIZATIONS = ("float16", "int8")
+
+
+def unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale vectors (the last axis) to unit length so dot products are cosines"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def maximal_marginal_relevance(
+    query_embedding,
+    candidate_embeddings,
+    k: int = 4,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Pick k diverse candidates by Maximal Marginal Relevance
+    
+    Overlapping chunks often come back as near-duplicates; each pick balances
+    similarity to the query against similarity to what is already chosen.
+    All pairwise cosines are computed once up front.
+    
+    Args:
+        query_embedding: Query vector
+        candidate_embeddings: One vector per candidate, shape (n, d)
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks purely by relevance, 0.0 purely by diversity
+    
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    candidates = unit_rows(np.asarray(candidate_embeddings, dtype=np.float32))
+    query = unit_rows(np.asarray(query_embedding, dtype=np.float32))
+    if len(candidates) == 0 or k <= 0:
+        return []
+    
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of each candidate to anything selected so far
+    redundancy = similarity[:, selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+    
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[:, best], out=redundancy)
+    
+    return selected
+
+
+def save_embedding_matrix(
+    directory: str,
+    ids: List[str],
+    vectors: np.ndarray,
+    documents: List[str],
+    metadatas: List[dict],
+    embedding_id: str,
+    quantization: str = "float16"
+) -> None:
+    """
+    Write the corpus embeddings as one compact matrix, plus the chunk texts
+    
+    Args:
+        directory: Vector store directory
+        ids: Chunk ids, one per row
+        vectors: Unit-length embeddings, shape (n, d)
+        documents: Chunk texts, one per row
+        metadatas: Chunk metadata, one per row
+        embedding_id: Identity of the vector space (see embeddings.embedding_identity)
+        quantization: "float16", or "int8" with a per-row scale
+    
+    Raises:
+        ValueError: If quantization is not one of MATRIX_QUANTIZATIONS
+    """
+    if quantization not in MATRIX_QUANTIZATIONS:
+        raise ValueError(
+            f"Unknown quantization '{quantization}'. "
+            f"Use one of: {', '.join(MATRIX_QUANTIZATIONS)}"
+        )
+    
+    directory = Path(directory)
+    chunks_path = directory / CHUNKS_FILE
+    vectors = np.asarray(vectors, dtype=np.float32)
+    
+    arrays = {}
+    if quantization == "int8":
+        # Symmetric per-row scaling: each row's largest component maps to 127
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        arrays[INT8_VECTORS_FILE] = np.round(vectors / scales[:, None]).astype(np.int8)
+        arrays[INT8_SCALES_FILE] = scales.astype(np.float32)
+    else:
+        arrays[VECTORS_FILE] = vectors.astype(np.float16)
+    
+    # Write under temporary names and swap in, so a reader never sees a
+    # matrix that does not match the chunk list
+    written = []
+    for name, array in arrays.items():
+        tmp_path = (directory / name).with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        written.append((tmp_path, directory / name))
+    tmp_chunks = chunks_path.with_suffix(".tmp")
+    tmp_chunks.write_bytes(orjson.dumps({
+        "embedding": embedding_id,
+        "quantization": quantization,
+        "ids": ids,
+        "documents": documents,
+        "metadatas": metadatas
+    }))
+    written.append((tmp_chunks, chunks_path))
+    for tmp_path, path in written:
+        os.replace(tmp_path, path)
+
+
+class EmbeddingMatrix:
+    """
+    Memory-mapped corpus embeddings for brute-force search
+    
+    Loading maps the file instead of reading it, so startup costs
+    milliseconds. For corpora of this size one matrix-vector product is
+    cheaper than walking the HNSW graph.
+    """
+    
+    BLOCK_ROWS = 16384
+    
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        scales: Optional[np.ndarray] = None
+    ):
+        self.vectors = vectors
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        # Per-row dequantization factors for int8 matrices
+        self.scales = scales
+    
+    @classmethod
+    def load(cls, directory: str, embedding_id: str) -> Optional["EmbeddingMatrix"]:
+        """
+        Map the matrix written by save_embedding_matrix()
+        
+        Args:
+            directory: Vector store directory
+            embedding_id: Vector space the caller queries with
+        
+        Returns:
+            EmbeddingMatrix, or None if the files are missing or were built
+            with a different embedding model
+        """
+        directory = Path(directory)
+        chunks_path = directory / CHUNKS_FILE
+        if not chunks_path.exists():
+            return None
+        
+        chunks = orjson.loads(chunks_path.read_bytes())
+        if chunks.get("embedding") != embedding_id:
+            return None
+        
+        scales = None
+        if chunks.get("quantization", "float16") == "int8":
+            vectors_path = directory / INT8_VECTORS_FILE
+            scales_path = directory / INT8_SCALES_FILE
+            if not vectors_path.exists() or not scales_path.exists():
+                return None
+            scales = np.load(scales_path)
+        else:
+            vectors_path = directory / VECTORS_FILE
+            if not vectors_path.exists():
+                return None
+        
+        vectors = np.load(vectors_path, mmap_mode="r")
+        if len(vectors) != len(chunks["ids"]):
+            return None
+        
+        return cls(vectors, chunks["ids"], chunks["documents"], chunks["metadatas"], scales)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def rows(self, indices) -> np.ndarray:
+        """Return the given rows as float32 vectors"""
+        vectors = self.vectors[indices].astype(np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[indices, None]
+        return vectors
+    
+    def search(self, query_embedding, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k rows most similar to the query
+        
+        Args:
+            query_embedding: Query vector
+            k: Number of rows to return
+        
+        Returns:
+            Tuple of (row indices, cosine scores), best match first
+        """
+        query = unit_rows(np.asarray(query_embedding, dtype=np.float32))
+        
+        if simsimd is not None and self.vectors.dtype == np.float16:
+            # simsimd's float16 kernels (AVX-512 FP16, NEON) read the matrix
+            # as stored; roughly 10x faster than upcasting it through numpy
+            scores = np.asarray(
+                simsimd.cdist(query.astype(np.float16)[None], self.vectors, metric="dot"),
+                dtype=np.float32
+            )[0]
+        else:
+            # numpy has no fast float16 (or int8) matmul, so upcast a block at
+            # a time; this keeps the float32 copy small however large the
+            # corpus is
+            scores = np.empty(len(self.vectors), dtype=np.float32)
+            for start in range(0, len(self.vectors), self.BLOCK_ROWS):
+                block = self.vectors[start:start + self.BLOCK_ROWS]
+                scores[start:start + len(block)] = block.astype(np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales
+        
+        # Partition out the k best in O(n), then sort only those k, rather
+        # than sorting every score
+        if k >= len(scores):
+            top = np.arange(len(scores))
+        else:
+            top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+
+def _import_faiss():
+    """
+    Import faiss on first use, or return None if it is not installed
+    
+    Only stores built with ann_backend="faiss" need it, so it is not
+    imported by every process that loads this module.
+    """
+    try:
+        import faiss
+    except ImportError:
+        return None
+    return faiss
+
+
+def build_faiss_index(directory: str, vectors: np.ndarray, ivfpq_threshold: int = 100_000) -> None:
+    """
+    Write a FAISS index over the embedding matrix, for corpora too large
+    to search by brute force
+    
+    Below ivfpq_threshold vectors the index is exact (flat inner product).
+    Above it, an IVF-PQ index stores each vector as 16 one-byte codes,
+    trained on a sample of the corpus. Index ids are matrix row numbers.
+    
+    Args:
+        directory: Vector store directory
+        vectors: Unit-length embeddings, shape (n, d)
+        ivfpq_threshold: Corpus size at which to switch to IVF-PQ
+    
+    Raises:
+        ImportError: If faiss is not installed
+    """
+    faiss = _import_faiss()
+    if faiss is None:
+        raise ImportError(
+            "ann_backend='faiss' requires faiss. "
+            "Install it with: pip install faiss-cpu"
+        )
+    
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    count, dimensions = vectors.shape
+    
+    if count < ivfpq_threshold:
+        index = faiss.IndexFlatIP(dimensions)
+        index.add(vectors)
+    else:
+        nlist = min(4096, int(4 * np.sqrt(count)))
+        # PQ splits each vector into equal sub-vectors
+        subquantizers = next(m for m in (16, 8, 4, 2, 1) if dimensions % m == 0)
+        quantizer = faiss.IndexFlatIP(dimensions)
+        index = faiss.IndexIVFPQ(
+            quantizer, dimensions, nlist, subquantizers, 8, faiss.METRIC_INNER_PRODUCT
+        )
+        sample = np.random.default_rng(0).choice(count, size=min(count, 64 * nlist), replace=False)
+        index.train(vectors[np.sort(sample)])
+        index.add_with_ids(vectors, np.arange(count, dtype=np.int64))
+    
+    path = Path(directory) / FAISS_INDEX_FILE
+    tmp_path = path.with_suffix(".tmp")
+    faiss.write_index(index, str(tmp_path))
+    os.replace(tmp_path, path)
+
+
+class FaissIndex:
+    """
+    Memory-mapped FAISS index written by build_faiss_index()
+    
+    Searches the same rows as EmbeddingMatrix.search() and returns results
+    in the same form, so the agent can use either. PQ scores are coarse, so
+    extra candidates are fetched and re-scored exactly against the matrix.
+    """
+    
+    # Inverted lists visited per IVF query; higher is slower but more accurate
+    NPROBE = 32
+    # Candidates fetched per requested result, for exact re-scoring
+    RERANK_FACTOR = 8
+    
+    def __init__(self, index, matrix: EmbeddingMatrix):
+        self.index = index
+        self.matrix = matrix
+        # A flat index is exact; only IVF-PQ needs extra candidates
+        self.fetch_factor = 1
+        if hasattr(index, "nprobe"):
+            index.nprobe = self.NPROBE
+            self.fetch_factor = self.RERANK_FACTOR
+    
+    @classmethod
+    def load(cls, directory: str, matrix: EmbeddingMatrix) -> Optional["FaissIndex"]:
+        """
+        Map the index in a vector store directory
+        
+        Args:
+            directory: Vector store directory
+            matrix: Embedding matrix the index was built from
+        
+        Returns:
+            FaissIndex, or None if faiss is not installed, the file is
+            missing, or it indexes a different number of rows
+        """
+        path = Path(directory) / FAISS_INDEX_FILE
+        if not path.exists():
+            return None
+        faiss = _import_faiss()
+        if faiss is None:
+            return None
+        
+        index = faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        if index.ntotal != len(matrix):
+            return None
+        return cls(index, matrix)
+    
+    def search(self, query_embedding, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find (approximately, for IVF-PQ) the k rows most similar to the query
+        
+        Args:
+            query_embedding: Query vector
+            k: Number of rows to return
+        
+        Returns:
+            Tuple of (row indices, similarity scores), best match first
+        """
+        query = unit_rows(np.asarray(query_embedding, dtype=np.float32))
+        _, rows = self.index.search(query.reshape(1, -1), k * self.fetch_factor)
+        # Fewer hits than requested are padded with -1
+        rows = rows[0][rows[0] >= 0]
+        
+        scores = self.matrix.rows(rows) @ query
+        top = np.argsort(-scores)[:k]
+        return rows[top], scores[top]
+
+
+def build_keyword_index(
+    directory: str,
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[dict]
+) -> None:
+    """
+    Write an SQLite FTS5 full-text index over the chunk texts
+    
+    Args:
+        directory: Vector store directory
+        ids: Chunk ids, one per document
+        documents: Chunk texts
+        metadatas: Chunk metadata, stored alongside for lookups
+    """
+    path = Path(directory) / KEYWORD_INDEX_FILE
+    tmp_path = path.with_suffix(".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            conn.execute(
+                "CREATE VIRTUAL TABLE chunks USING fts5("
+                "content, chunk_id UNINDEXED, metadata UNINDEXED, "
+                "tokenize='porter unicode61')"
+            )
+            conn.executemany(
+                "INSERT INTO chunks (content, chunk_id, metadata) VALUES (?, ?, ?)",
+                (
+                    (text, chunk_id, orjson.dumps(metadata).decode("utf-8"))
+                    for chunk_id, text, metadata in zip(ids, documents, metadatas)
+                )
+            )
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+class KeywordIndex:
+    """
+    BM25 keyword search over the FTS5 index written by build_keyword_index()
+    
+    Catches exact terms (section numbers, names, acronyms) that embeddings
+    can rank poorly; results are fused with the vector search.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    
+    @classmethod
+    def load(cls, directory: str) -> Optional["KeywordIndex"]:
+        """Open the index in a vector store directory, or None if there is none"""
+        path = Path(directory) / KEYWORD_INDEX_FILE
+        if not path.exists():
+            return None
+        return cls(path)
+    
+    @staticmethod
+    def _match_expression(query: str) -> str:
+        """Turn free text into an FTS5 query matching any of its words"""
+        terms = [term for term in re.findall(r"\w+", query.lower()) if len(term) > 2]
+        return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+    
+    def search(self, query: str, k: int = 4) -> List[Dict]:
+        """
+        Find the chunks that best match the query's words
+        
+        Args:
+            query: User's question
+            k: Number of results to return
+        
+        Returns:
+            List of {"id", "document", "metadata"} dictionaries, best first
+        """
+        expression = self._match_expression(query)
+        if not expression:
+            return []
+        
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id, content, metadata FROM chunks "
+                "WHERE chunks MATCH ? ORDER BY rank LIMIT ?",
+                (expression, k)
+            ).fetchall()
+        return [
+            {"id": chunk_id, "document": content, "metadata": orjson.loads(metadata)}
+            for chunk_id, content, metadata in rows
+        ]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """
+    Merge ranked id lists, favouring ids ranked highly in several lists
+    
+    Args:
+        rankings: Lists of ids, each best first
+        k: Damping constant; 60 is the value from the original RRF paper
+    
+    Returns:
+        All ids, ordered by fused score
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -88,27 +88,17 @@ def setup_vector_database():
     print("NELFUND VECTOR DATABASE SETUP")
     print("="*80 + "\n")
     
-    # Step 1: Load documents
-    print("STEP 1: Loading NELFUND Documents")
+    # Step 1: Load and chunk documents
+    print("STEP 1: Loading and Chunking NELFUND Documents")
     print("-" * 80)
     
     try:
         processor = NELFUNDDocumentProcessor(data_directory="./data")
-        documents = processor.load_documents()
-        print(f"✓ Loaded {len(documents)} document pages")
-    except Exception as e:
-        logger.error(f"Error loading documents: {e}")
-        return False
-    
-    # Step 2: Chunk documents
-    print("\nSTEP 2: Chunking Documents")
-    print("-" * 80)
-    
-    try:
         chunks = processor.chunk_documents(
             chunk_size=1000,
             chunk_overlap=200
         )
+        print(f"✓ Loaded {processor.total_pages} document pages")
         print(f"✓ Created {len(chunks)} chunks")
         
         # Show statistics
@@ -130,11 +120,11 @@ def setup_vector_database():
             print(f"\nContent:\n{sample.page_content[:300]}...")
             print("-" * 80)
     except Exception as e:
-        logger.error(f"Error chunking documents: {e}")
+        logger.error(f"Error loading documents: {e}")
         return False
     
-    # Step 3: Create vector store
-    print("\nSTEP 3: Creating Vector Database")
+    # Step 2: Create vector store
+    print("\nSTEP 2: Creating Vector Database")
     print("-" * 80)
     print("This will embed all chunks using OpenAI...")
     print("(This may take 2-5 minutes depending on document size)\n")
@@ -169,8 +159,8 @@ def setup_vector_database():
         traceback.print_exc()
         return False
     
-    # Step 4: Test the vector store
-    print("\nSTEP 4: Testing Vector Database")
+    # Step 3: Test the vector store
+    print("\nSTEP 3: Testing Vector Database")
     print("-" * 80)
     
     test_queries = [
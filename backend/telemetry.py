@@ -0,0 +1,55 @@
+"""
+NELFUND Tracing
+OpenTelemetry setup; spans are exported over OTLP when an endpoint is configured
+"""
+
+import os
+
+from opentelemetry import trace
+
+try:
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+except ImportError:
+    TracerProvider = None
+
+try:
+    # Optional: adds spans for every LangChain runnable (prompt, LLM call)
+    from opentelemetry.instrumentation.langchain import LangchainInstrumentor
+except ImportError:
+    LangchainInstrumentor = None
+
+
+def configure_tracing(service_name: str = "nelfund-backend") -> bool:
+    """
+    Export spans over OTLP (e.g. to Jaeger or Tempo)
+    
+    Does nothing unless OTEL_EXPORTER_OTLP_ENDPOINT is set, so spans stay
+    no-ops in development. The exporter reads the standard OTEL_EXPORTER_OTLP_*
+    variables; OTEL_SERVICE_NAME overrides the service name.
+    
+    Args:
+        service_name: Service name reported with every span
+    
+    Returns:
+        True if spans are being exported
+    """
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return False
+    if TracerProvider is None:
+        print("Warning: OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk "
+              "or opentelemetry-exporter-otlp is not installed; tracing disabled")
+        return False
+    
+    resource = Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)})
+    provider = TracerProvider(resource=resource)
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    
+    if LangchainInstrumentor is not None:
+        LangchainInstrumentor().instrument()
+    
+    print(f"✓ Exporting traces to {os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT')}")
+    return True
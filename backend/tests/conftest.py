@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: the backend modules import each other by bare name
+(e.g. "from chat_store import open_connection"), so put backend/ on the path
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
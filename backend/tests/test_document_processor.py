@@ -0,0 +1,87 @@
+"""
+Tests for chunk merging and file hashing in the document processor
+"""
+
+import hashlib
+
+from langchain.schema import Document
+
+from document_processor import _file_digest, _get_splitter, _merge_adjacent
+
+PAGE = "\n\n".join(
+    f"Paragraph {i}. " + "Students may apply for loans through the portal. " * (i % 4 + 1)
+    for i in range(30)
+)
+
+
+def split_page(text, size, overlap):
+    return _get_splitter(size, overlap).split_documents(
+        [Document(page_content=text, metadata={"source": "guide.pdf", "page": 1})]
+    )
+
+
+def assert_chunks_are_verbatim(chunks, page_text):
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        assert page_text[start:start + len(chunk.page_content)] == chunk.page_content
+
+
+def test_merged_chunks_keep_their_page_offsets():
+    chunks = split_page(PAGE, 120, 20)
+    
+    merged = _merge_adjacent(chunks, PAGE, max_size=400, min_size=100, overlap=20)
+    
+    assert len(merged) < len(chunks)
+    assert_chunks_are_verbatim(merged, PAGE)
+    assert all(len(chunk.page_content) <= 400 * 1.1 for chunk in merged)
+    assert all(chunk.metadata["source"] == "guide.pdf" for chunk in merged)
+    # Nothing but whitespace is lost between consecutive chunks
+    for before, after in zip(merged, merged[1:]):
+        gap_start = before.metadata["start_index"] + len(before.page_content)
+        assert PAGE[gap_start:after.metadata["start_index"]].strip() == ""
+
+
+def test_chunks_with_unknown_offsets_are_not_merged():
+    page = "alpha beta gamma delta"
+    chunks = [
+        Document(page_content="alpha beta", metadata={"start_index": 0}),
+        Document(page_content="gamma", metadata={"start_index": -1}),
+        Document(page_content="not on the page", metadata={"start_index": 11}),
+        Document(page_content="delta", metadata={"start_index": 17})
+    ]
+    
+    merged = _merge_adjacent(chunks, page, max_size=100, min_size=10, overlap=0)
+    
+    assert [chunk.page_content for chunk in merged] == ["alpha beta", "gamma", "not on the page", "delta"]
+
+
+def test_undersized_chunks_merge_past_the_maximum():
+    page = "A long opening sentence about repayment. Short."
+    chunks = [
+        Document(page_content="A long opening sentence about repayment.", metadata={"start_index": 0}),
+        Document(page_content="Short.", metadata={"start_index": 41})
+    ]
+    
+    merged = _merge_adjacent(chunks, page, max_size=44, min_size=10, overlap=0)
+    
+    assert [chunk.page_content for chunk in merged] == [page]
+    assert merged[0].metadata["start_index"] == 0
+
+
+def test_oversized_merges_are_split_with_page_offsets():
+    chunks = split_page(PAGE, 120, 20)
+    # Every chunk is "undersized", so the whole page merges into one and
+    # has to be split again
+    merged = _merge_adjacent(chunks, PAGE, max_size=300, min_size=1000, overlap=20)
+    
+    assert len(merged) > 1
+    assert all(len(chunk.page_content) <= 300 for chunk in merged)
+    assert_chunks_are_verbatim(merged, PAGE)
+
+
+def test_file_digest_matches_hashlib(tmp_path):
+    path = tmp_path / "large.pdf"
+    data = bytes(range(256)) * 5000
+    path.write_bytes(data)
+    
+    assert _file_digest(str(path)) == hashlib.sha256(data).hexdigest()
@@ -0,0 +1,139 @@
+"""
+Tests for embedding backend selection and the embedding caches
+"""
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from embeddings import (
+    CachedEmbeddings,
+    DocumentEmbeddingCache,
+    embedding_identity,
+    get_embedding_backend,
+    get_embedding_dimensions
+)
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake model that records every text it embeds"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def embed_documents(self, texts):
+        self.calls.extend(texts)
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+    
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_backend_comes_from_the_environment(monkeypatch):
+    monkeypatch.delenv("EMBEDDING_BACKEND", raising=False)
+    assert get_embedding_backend() == "openai"
+    
+    monkeypatch.setenv("EMBEDDING_BACKEND", " Local ")
+    assert get_embedding_backend() == "local"
+    
+    monkeypatch.setenv("EMBEDDING_BACKEND", "cohere")
+    with pytest.raises(ValueError):
+        get_embedding_backend()
+
+
+def test_dimensions_default_to_full_size(monkeypatch):
+    monkeypatch.delenv("EMBEDDING_DIMENSIONS", raising=False)
+    assert get_embedding_dimensions() is None
+    
+    monkeypatch.setenv("EMBEDDING_DIMENSIONS", "512")
+    assert get_embedding_dimensions() == 512
+
+
+def test_embedding_identity_includes_the_size_only_when_shortened():
+    assert embedding_identity("openai", "text-embedding-3-small") == "openai:text-embedding-3-small"
+    assert embedding_identity("openai", "text-embedding-3-small", 512) == "openai:text-embedding-3-small@512"
+
+
+def test_repeated_queries_are_served_from_the_cache(tmp_path):
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, str(tmp_path / "embed.db"), "fake:model")
+    
+    first = cache.embed_query("Who is eligible?")
+    second = cache.embed_query("  who IS   eligible? ")
+    
+    assert inner.calls == ["Who is eligible?"]
+    np.testing.assert_allclose(second, first, rtol=1e-3)
+    
+    reopened = CachedEmbeddings(inner, str(tmp_path / "embed.db"), "fake:model")
+    reopened.embed_query("who is eligible?")
+    assert len(inner.calls) == 1
+
+
+def test_query_cache_is_per_model(tmp_path):
+    inner = CountingEmbeddings()
+    db_path = str(tmp_path / "embed.db")
+    
+    CachedEmbeddings(inner, db_path, "fake:model").embed_query("a")
+    CachedEmbeddings(inner, db_path, "other:model").embed_query("a")
+    
+    assert inner.calls == ["a", "a"]
+
+
+def test_least_recently_used_query_is_evicted(tmp_path):
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, str(tmp_path / "embed.db"), "fake:model", max_entries=2)
+    
+    cache.embed_query("a")
+    cache.embed_query("b")
+    cache.embed_query("a")
+    cache.embed_query("c")
+    assert inner.calls == ["a", "b", "c"]
+    
+    # "b" was least recently used when "c" arrived
+    cache.embed_query("a")
+    cache.embed_query("c")
+    cache.embed_query("b")
+    assert inner.calls == ["a", "b", "c", "b"]
+
+
+def test_documents_are_not_cached(tmp_path):
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, str(tmp_path / "embed.db"), "fake:model")
+    
+    cache.embed_documents(["x", "y"])
+    cache.embed_documents(["x"])
+    
+    assert inner.calls == ["x", "y", "x"]
+
+
+def test_document_cache_returns_exact_vectors(tmp_path):
+    db_path = str(tmp_path / "doc_embeddings.db")
+    cache = DocumentEmbeddingCache(db_path, "fake:model")
+    vectors = np.random.default_rng(0).standard_normal((2, 8)).astype(np.float32)
+    
+    cache.put_many(["alpha", "beta"], vectors)
+    found = cache.get_many(["beta", "gamma", "alpha"])
+    
+    np.testing.assert_array_equal(found[0], vectors[1])
+    assert found[1] is None
+    np.testing.assert_array_equal(found[2], vectors[0])
+    # Keys are the exact text: no normalization for chunks
+    assert cache.get_many(["Alpha"]) == [None]
+    assert DocumentEmbeddingCache(db_path, "other:model").get_many(["alpha"]) == [None]
+    cache.close()
+
+
+def test_document_cache_lookups_are_batched(tmp_path, monkeypatch):
+    monkeypatch.setattr(DocumentEmbeddingCache, "LOOKUP_BATCH", 3)
+    cache = DocumentEmbeddingCache(str(tmp_path / "doc_embeddings.db"), "fake:model")
+    texts = [f"chunk {i}" for i in range(10)]
+    vectors = np.arange(20, dtype=np.float32).reshape(10, 2)
+    
+    cache.put_many(texts[::2], vectors[::2])
+    found = cache.get_many(texts)
+    
+    for i, vector in enumerate(found):
+        if i % 2:
+            assert vector is None
+        else:
+            np.testing.assert_array_equal(vector, vectors[i])
@@ -0,0 +1,140 @@
+"""
+Tests for the two-tier response cache
+"""
+
+import time
+
+import pytest
+
+from response_cache import ResponseCache
+
+HISTORY = ["What is NELFUND?", "The Nigerian Education Loan Fund."]
+
+
+class Clock:
+    """Controllable replacement for time.time"""
+    
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "response_cache.db")
+
+
+def test_exact_hit_ignores_case_and_whitespace(db_path, clock):
+    cache = ResponseCache(db_path)
+    cache.put("Who is eligible?", HISTORY, None, "Students", ["faq.pdf"])
+    
+    hit = cache.get("  who IS\teligible? ", HISTORY)
+    
+    assert hit == {"response": "Students", "sources": ["faq.pdf"]}
+    assert cache.get("Who is eligible?", []) is None
+
+
+def test_only_recent_history_is_part_of_the_key(db_path, clock):
+    cache = ResponseCache(db_path, history_window=2)
+    cache.put("q", ["old", "a", "b"], None, "answer", [])
+    
+    assert cache.get("q", ["different old", "a", "b"]) is not None
+    assert cache.get("q", ["a", "c"]) is None
+
+
+def test_semantic_hit_needs_similarity_and_same_history(db_path, clock):
+    cache = ResponseCache(db_path, similarity_threshold=0.9)
+    cache.put("How do I apply?", HISTORY, [1.0, 0.0, 0.0], "Apply online", ["guide.pdf"])
+    
+    # Same direction after normalization, different wording
+    assert cache.get("What's the application process?", HISTORY, [2.0, 0.1, 0.0]) == {
+        "response": "Apply online",
+        "sources": ["guide.pdf"]
+    }
+    assert cache.get("What's the application process?", HISTORY, [0.0, 1.0, 0.0]) is None
+    assert cache.get("What's the application process?", [], [2.0, 0.1, 0.0]) is None
+
+
+def test_semantic_tier_skips_expired_best_match(db_path, clock):
+    cache = ResponseCache(db_path, ttl=100, similarity_threshold=0.9)
+    cache.put("stale", HISTORY, [1.0, 0.0], "stale answer", [])
+    clock.now += 60
+    cache.put("fresh", HISTORY, [0.95, 0.31], "fresh answer", [])
+    clock.now += 60
+    
+    # "stale" is the closer match but has expired
+    hit = cache.get("query", HISTORY, [1.0, 0.0])
+    
+    assert hit["response"] == "fresh answer"
+
+
+def test_expired_exact_hit_falls_back_to_semantic_tier(db_path, clock):
+    cache = ResponseCache(db_path, ttl=100, similarity_threshold=0.9)
+    cache.put("query", HISTORY, [1.0, 0.0], "old answer", [])
+    clock.now += 60
+    cache.put("similar query", HISTORY, [1.0, 0.05], "new answer", [])
+    clock.now += 60
+    
+    assert cache.get("query", HISTORY, [1.0, 0.0])["response"] == "new answer"
+    assert cache.get("query", HISTORY) is None
+
+
+def test_embeddings_of_another_size_are_ignored(db_path, clock):
+    cache = ResponseCache(db_path, similarity_threshold=0.9)
+    cache.put("old model", HISTORY, [1.0, 0.0, 0.0, 0.0], "four", [])
+    cache.put("new model", HISTORY, [1.0, 0.0], "two", [])
+    
+    assert cache.get("query", HISTORY, [1.0, 0.0])["response"] == "two"
+    assert cache.get("query", HISTORY, [1.0, 0.0, 0.0, 0.0])["response"] == "four"
+    assert cache.get("query", HISTORY, [1.0, 0.0, 0.0]) is None
+
+
+def test_least_recently_used_entry_is_evicted(db_path, clock):
+    cache = ResponseCache(db_path, max_entries=2)
+    cache.put("a", [], None, "A", [])
+    cache.put("b", [], None, "B", [])
+    cache.get("a", [])
+    cache.put("c", [], None, "C", [])
+    
+    assert cache.get("b", []) is None
+    assert cache.get("a", [])["response"] == "A"
+    assert cache.get("c", [])["response"] == "C"
+    assert ResponseCache(db_path).get("b", []) is None
+
+
+def test_entries_survive_a_restart_until_they_expire(db_path, clock):
+    cache = ResponseCache(db_path, ttl=100)
+    cache.put("q", HISTORY, [0.6, 0.8], "answer", ["faq.pdf"])
+    
+    reopened = ResponseCache(db_path, ttl=100, similarity_threshold=0.9)
+    assert reopened.get("q", HISTORY) == {"response": "answer", "sources": ["faq.pdf"]}
+    assert reopened.get("other", HISTORY, [0.6, 0.8])["response"] == "answer"
+    
+    clock.now += 101
+    assert ResponseCache(db_path, ttl=100).get("q", HISTORY) is None
+
+
+def test_answers_from_another_index_are_discarded(db_path, clock):
+    ResponseCache(db_path, index_id="build-1").put("q", [], None, "answer", [])
+    
+    assert ResponseCache(db_path, index_id="build-1").get("q", []) is not None
+    assert ResponseCache(db_path, index_id="build-2").get("q", []) is None
+    assert ResponseCache(db_path, index_id="build-1").get("q", []) is None
+
+
+def test_clear(db_path, clock):
+    cache = ResponseCache(db_path)
+    cache.put("q", [], [1.0], "answer", [])
+    cache.clear()
+    
+    assert cache.get("q", [], [1.0]) is None
+    assert ResponseCache(db_path).get("q", []) is None
@@ -0,0 +1,186 @@
+"""
+Tests for the numpy, FAISS and FTS5 retrieval helpers
+"""
+
+import numpy as np
+import pytest
+
+import retrieval
+from retrieval import (
+    EmbeddingMatrix,
+    FaissIndex,
+    KeywordIndex,
+    build_faiss_index,
+    build_keyword_index,
+    maximal_marginal_relevance,
+    reciprocal_rank_fusion,
+    save_embedding_matrix,
+    unit_rows
+)
+
+EMBEDDING_ID = "test:model"
+
+
+def random_unit_vectors(count, dimensions, seed=0):
+    rng = np.random.default_rng(seed)
+    return unit_rows(rng.standard_normal((count, dimensions)).astype(np.float32))
+
+
+def save_corpus(directory, vectors, quantization="float16"):
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    documents = [f"document {i}" for i in range(len(vectors))]
+    metadatas = [{"source": f"doc{i}.pdf", "page": i} for i in range(len(vectors))]
+    save_embedding_matrix(str(directory), ids, vectors, documents, metadatas, EMBEDDING_ID, quantization)
+    return ids
+
+
+def test_unit_rows_leaves_zero_vectors_alone():
+    rows = unit_rows(np.array([[3.0, 4.0], [0.0, 0.0]]))
+    
+    np.testing.assert_allclose(rows, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_mmr_picks_most_relevant_first_then_avoids_duplicates():
+    query = [1.0, 0.0]
+    candidates = [
+        [1.0, 0.0],     # best match
+        [0.99, 0.01],   # near-duplicate of the best match
+        [0.7, 0.7]      # less relevant but new
+    ]
+    
+    assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=0.3) == [0, 2]
+    assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=1.0) == [0, 1]
+
+
+def test_mmr_handles_small_and_empty_inputs():
+    assert maximal_marginal_relevance([1.0, 0.0], [[0.0, 1.0], [1.0, 0.0]], k=5) == [1, 0]
+    assert maximal_marginal_relevance([1.0, 0.0], np.zeros((0, 2)), k=3) == []
+    assert maximal_marginal_relevance([1.0, 0.0], [[1.0, 0.0]], k=0) == []
+
+
+def test_rrf_favours_ids_ranked_in_several_lists():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["d", "b", "c"]])
+    
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+def test_rrf_ties_keep_first_seen_order():
+    assert reciprocal_rank_fusion([["a", "b"], ["b", "a"]]) == ["a", "b"]
+    assert reciprocal_rank_fusion([["x"], ["y"], ["z"]]) == ["x", "y", "z"]
+
+
+@pytest.mark.parametrize("quantization, tolerance", [("float16", 1e-3), ("int8", 2e-2)])
+def test_matrix_search_matches_exact_cosines(tmp_path, quantization, tolerance):
+    vectors = random_unit_vectors(50, 16)
+    ids = save_corpus(tmp_path, vectors, quantization)
+    query = random_unit_vectors(1, 16, seed=1)[0]
+    
+    matrix = EmbeddingMatrix.load(str(tmp_path), EMBEDDING_ID)
+    rows, scores = matrix.search(query, k=5)
+    
+    exact = vectors @ query
+    assert len(matrix) == 50
+    assert list(rows) == list(np.argsort(-exact)[:5])
+    np.testing.assert_allclose(scores, exact[rows], atol=tolerance)
+    np.testing.assert_allclose(matrix.rows(rows) @ query, exact[rows], atol=tolerance)
+    assert matrix.ids[rows[0]] == ids[rows[0]]
+    assert matrix.metadatas[rows[0]] == {"source": f"doc{rows[0]}.pdf", "page": int(rows[0])}
+
+
+def test_matrix_numpy_path_scores_every_block(tmp_path, monkeypatch):
+    monkeypatch.setattr(retrieval, "simsimd", None)
+    monkeypatch.setattr(EmbeddingMatrix, "BLOCK_ROWS", 7)
+    vectors = random_unit_vectors(30, 8)
+    save_corpus(tmp_path, vectors)
+    
+    rows, scores = EmbeddingMatrix.load(str(tmp_path), EMBEDDING_ID).search(vectors[23], k=40)
+    
+    assert len(rows) == 30
+    assert rows[0] == 23
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_matrix_from_another_model_is_not_loaded(tmp_path):
+    save_corpus(tmp_path, random_unit_vectors(5, 4), "int8")
+    
+    assert EmbeddingMatrix.load(str(tmp_path), "other:model") is None
+    (tmp_path / retrieval.INT8_SCALES_FILE).unlink()
+    assert EmbeddingMatrix.load(str(tmp_path), EMBEDDING_ID) is None
+    assert EmbeddingMatrix.load(str(tmp_path / "missing"), EMBEDDING_ID) is None
+
+
+def test_unknown_quantization_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        save_corpus(tmp_path, random_unit_vectors(2, 4), "int4")
+
+
+def test_flat_faiss_index_matches_brute_force(tmp_path):
+    pytest.importorskip("faiss")
+    vectors = random_unit_vectors(200, 16)
+    save_corpus(tmp_path, vectors)
+    build_faiss_index(str(tmp_path), vectors)
+    matrix = EmbeddingMatrix.load(str(tmp_path), EMBEDDING_ID)
+    query = random_unit_vectors(1, 16, seed=2)[0]
+    
+    index = FaissIndex.load(str(tmp_path), matrix)
+    rows, scores = index.search(query, k=5)
+    expected_rows, expected_scores = matrix.search(query, k=5)
+    
+    assert index.fetch_factor == 1
+    assert list(rows) == list(expected_rows)
+    np.testing.assert_allclose(scores, expected_scores, atol=1e-3)
+
+
+def test_ivfpq_results_are_rescored_exactly(tmp_path):
+    pytest.importorskip("faiss")
+    vectors = random_unit_vectors(2000, 32)
+    save_corpus(tmp_path, vectors)
+    build_faiss_index(str(tmp_path), vectors, ivfpq_threshold=1000)
+    matrix = EmbeddingMatrix.load(str(tmp_path), EMBEDDING_ID)
+    
+    index = FaissIndex.load(str(tmp_path), matrix)
+    rows, scores = index.search(vectors[42], k=5)
+    
+    assert index.fetch_factor == FaissIndex.RERANK_FACTOR
+    assert rows[0] == 42
+    np.testing.assert_allclose(scores, matrix.rows(rows) @ vectors[42], atol=1e-6)
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_faiss_index_for_another_corpus_is_not_loaded(tmp_path):
+    pytest.importorskip("faiss")
+    build_faiss_index(str(tmp_path), random_unit_vectors(10, 8))
+    save_corpus(tmp_path, random_unit_vectors(12, 8))
+    
+    assert FaissIndex.load(str(tmp_path), EmbeddingMatrix.load(str(tmp_path), EMBEDDING_ID)) is None
+
+
+def test_match_expression_quotes_distinct_words():
+    expression = KeywordIndex._match_expression('Is the "NELFUND" loan OR-free? NELFUND!')
+    
+    assert expression == '"the" OR "nelfund" OR "loan" OR "free"'
+    assert KeywordIndex._match_expression("is a ?") == ""
+
+
+def test_keyword_search_ranks_matching_chunks(tmp_path):
+    build_keyword_index(
+        str(tmp_path),
+        ["c1", "c2", "c3"],
+        [
+            "Section 14 covers repayment after graduation.",
+            "Applicants must be admitted to a public institution.",
+            "Repayment starts two years after national service; repayment is income based."
+        ],
+        [{"source": "act.pdf"}, {"source": "faq.pdf"}, {"source": "guide.pdf", "page": 3}]
+    )
+    index = KeywordIndex.load(str(tmp_path))
+    
+    results = index.search("When does repayment start?", k=2)
+    
+    assert [result["id"] for result in results] == ["c3", "c1"]
+    assert results[0]["metadata"] == {"source": "guide.pdf", "page": 3}
+    assert results[0]["document"].startswith("Repayment starts")
+    assert index.search("a ?") == []
+    assert index.search('"); DROP TABLE chunks; --') == []
+    assert KeywordIndex.load(str(tmp_path / "missing")) is None
@@ -0,0 +1,187 @@
+"""
+Tests for the SQLite chat and user stores
+"""
+
+import sqlite3
+
+import pytest
+
+from chat_store import ChatStore
+from user_store import UserStore
+
+
+class FakeCollection:
+    """Stands in for a legacy ChromaDB collection: only get() is used"""
+    
+    def __init__(self, records):
+        self.records = records
+    
+    def get(self):
+        return {
+            "ids": [record_id for record_id, _ in self.records],
+            "metadatas": [metadata for _, metadata in self.records]
+        }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "chat_history.db")
+
+
+def add(store, chat_id, user_id, session_id, ts, message="hi", sources=None):
+    store.add_chat(chat_id, user_id, session_id, message, f"re: {message}", ts, sources)
+
+
+def test_session_chats_are_oldest_first_and_scoped(db_path):
+    store = ChatStore(db_path)
+    add(store, "c2", "u1", "s1", "2024-01-01T10:02:00", "second", ["b.pdf"])
+    add(store, "c1", "u1", "s1", "2024-01-01T10:01:00", "first", ["a.pdf", "b.pdf"])
+    add(store, "c3", "u1", "s2", "2024-01-01T10:00:00", "other session")
+    add(store, "c4", "u2", "s1", "2024-01-01T10:00:00", "other user")
+    
+    chats = store.get_session_chats("u1", "s1")
+    
+    assert [chat["id"] for chat in chats] == ["c1", "c2"]
+    assert chats[0]["user_message"] == "first"
+    assert chats[0]["bot_response"] == "re: first"
+    assert chats[0]["sources"] == ["a.pdf", "b.pdf"]
+
+
+def test_sources_default_to_empty_list(db_path):
+    store = ChatStore(db_path)
+    add(store, "c1", "u1", "s1", "2024-01-01T10:00:00")
+    
+    assert store.get_session_chats("u1", "s1")[0]["sources"] == []
+
+
+def test_user_chats_are_newest_first(db_path):
+    store = ChatStore(db_path)
+    add(store, "c1", "u1", "s1", "2024-01-01T10:00:00")
+    add(store, "c2", "u1", "s2", "2024-01-02T10:00:00")
+    add(store, "c3", "u2", "s3", "2024-01-03T10:00:00")
+    
+    assert [chat["id"] for chat in store.get_user_chats("u1")] == ["c2", "c1"]
+
+
+def test_sessions_are_summarised(db_path):
+    store = ChatStore(db_path)
+    long_question = "How do I apply for a student loan if my school " * 3
+    add(store, "c1", "u1", "s2", "2024-01-02T10:00:00", "later session")
+    add(store, "c2", "u1", "s1", "2024-01-01T10:05:00", "follow-up")
+    add(store, "c3", "u1", "s1", "2024-01-01T10:00:00", long_question)
+    
+    sessions = store.get_sessions("u1")
+    
+    assert [session["session_id"] for session in sessions] == ["s1", "s2"]
+    assert sessions[0]["message_count"] == 2
+    assert sessions[0]["timestamp"] == "2024-01-01T10:00:00"
+    assert sessions[0]["first_message"] == long_question[:50]
+    assert sessions[1]["first_message"] == "later session"
+
+
+def test_delete_session_only_touches_that_users_session(db_path):
+    store = ChatStore(db_path)
+    add(store, "c1", "u1", "s1", "2024-01-01T10:00:00")
+    add(store, "c2", "u1", "s1", "2024-01-01T10:01:00")
+    add(store, "c3", "u1", "s2", "2024-01-01T10:02:00")
+    add(store, "c4", "u2", "s1", "2024-01-01T10:03:00")
+    
+    assert store.delete_session("u1", "s1") == 2
+    assert store.get_session_chats("u1", "s1") == []
+    assert len(store.get_session_chats("u1", "s2")) == 1
+    assert len(store.get_session_chats("u2", "s1")) == 1
+
+
+def test_is_empty(db_path):
+    store = ChatStore(db_path)
+    assert store.is_empty()
+    add(store, "c1", "u1", "s1", "2024-01-01T10:00:00")
+    assert not store.is_empty()
+
+
+def test_chat_table_without_sources_column_is_upgraded(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE chats (chat_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, "
+        "session_id TEXT NOT NULL, ts TEXT NOT NULL, user_msg TEXT NOT NULL, "
+        "bot_resp TEXT NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO chats VALUES ('old', 'u1', 's1', '2024-01-01T09:00:00', 'q', 'a')"
+    )
+    conn.commit()
+    conn.close()
+    
+    store = ChatStore(db_path)
+    add(store, "new", "u1", "s1", "2024-01-01T10:00:00", sources=["a.pdf"])
+    
+    chats = store.get_session_chats("u1", "s1")
+    assert [(chat["id"], chat["sources"]) for chat in chats] == [("old", []), ("new", ["a.pdf"])]
+
+
+def test_chats_import_from_chroma_is_repeatable(db_path):
+    store = ChatStore(db_path)
+    collection = FakeCollection([
+        ("c1", {
+            "user_id": "u1",
+            "session_id": "s1",
+            "timestamp": "2024-01-01T10:00:00",
+            "user_message": "Am I eligible?",
+            "bot_response": "Probably."
+        })
+    ])
+    
+    assert store.import_from_chroma(collection) == 1
+    store.import_from_chroma(collection)
+    
+    chats = store.get_session_chats("u1", "s1")
+    assert len(chats) == 1
+    assert chats[0]["user_message"] == "Am I eligible?"
+    assert chats[0]["sources"] == []
+
+
+def test_user_lookup_by_email_and_id(db_path):
+    store = UserStore(db_path)
+    store.add_user("u1", "ada@example.com", "hash", "Ada", "2024-01-01T10:00:00")
+    
+    by_email = store.get_by_email("ada@example.com")
+    assert by_email == {"id": "u1", "email": "ada@example.com", "password": "hash", "full_name": "Ada"}
+    assert store.get_by_id("u1") == by_email
+    assert store.get_by_email("bob@example.com") is None
+    assert store.get_by_id("u2") is None
+
+
+def test_duplicate_email_is_rejected(db_path):
+    store = UserStore(db_path)
+    store.add_user("u1", "ada@example.com", "hash", "Ada", "2024-01-01T10:00:00")
+    
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_user("u2", "ada@example.com", "other", "Ada Two", "2024-01-02T10:00:00")
+
+
+def test_users_and_chats_share_one_database(db_path):
+    users = UserStore(db_path)
+    chats = ChatStore(db_path)
+    assert users.is_empty() and chats.is_empty()
+    
+    users.add_user("u1", "ada@example.com", "hash", "Ada", "2024-01-01T10:00:00")
+    
+    assert not users.is_empty()
+    assert chats.is_empty()
+
+
+def test_users_import_from_chroma(db_path):
+    store = UserStore(db_path)
+    collection = FakeCollection([
+        ("u1", {"email": "ada@example.com", "password": "h1", "full_name": "Ada",
+                "created_at": "2024-01-01T10:00:00"}),
+        # Older records have no created_at
+        ("u2", {"email": "bob@example.com", "password": "h2", "full_name": "Bob"})
+    ])
+    
+    assert store.import_from_chroma(collection) == 2
+    store.import_from_chroma(collection)
+    
+    assert store.get_by_email("bob@example.com")["id"] == "u2"
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 2
@@ -0,0 +1,155 @@
+"""
+NELFUND User Store
+Keeps user accounts in SQLite, looked up by id or unique email
+"""
+
+import sqlite3
+import threading
+from typing import Optional
+
+from chat_store import open_connection
+
+
+class UserStore:
+    """
+    SQLite-backed storage for user accounts
+    
+    ChromaDB has no secondary index on metadata and embedded every email on
+    insert; a plain table with a unique email index suits account lookups.
+    """
+    
+    def __init__(self, db_path: str = "./chat_history.db"):
+        """
+        Open (and create if needed) the user database
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = open_connection(db_path)
+        self._create_schema()
+    
+    def _create_schema(self) -> None:
+        """Create the users table"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    email TEXT NOT NULL UNIQUE,
+                    password TEXT NOT NULL,
+                    full_name TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+    
+    def add_user(
+        self,
+        user_id: str,
+        email: str,
+        password: str,
+        full_name: str,
+        created_at: str
+    ) -> None:
+        """
+        Create a user account
+        
+        Args:
+            user_id: Unique id for the user
+            email: Login email (must be unique)
+            password: bcrypt password hash
+            full_name: Display name
+            created_at: ISO-8601 creation timestamp
+        
+        Raises:
+            sqlite3.IntegrityError: If the email is already registered
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO users (user_id, email, password, full_name, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, email, password, full_name, created_at)
+            )
+    
+    def get_by_email(self, email: str) -> Optional[dict]:
+        """
+        Find a user by email
+        
+        Args:
+            email: Login email
+        
+        Returns:
+            User dictionary, or None if not registered
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, email, password, full_name FROM users WHERE email = ?",
+                (email,)
+            ).fetchone()
+        return self._row_to_user(row)
+    
+    def get_by_id(self, user_id: str) -> Optional[dict]:
+        """
+        Find a user by id
+        
+        Args:
+            user_id: User id
+        
+        Returns:
+            User dictionary, or None if not found
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, email, password, full_name FROM users WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+        return self._row_to_user(row)
+    
+    def is_empty(self) -> bool:
+        """Check whether any users have been stored yet"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone()
+        return row is None
+    
+    def import_from_chroma(self, collection) -> int:
+        """
+        Copy accounts from the legacy ChromaDB "users" collection
+        
+        Args:
+            collection: ChromaDB collection with user metadata
+        
+        Returns:
+            Number of users imported
+        """
+        results = collection.get()
+        rows = []
+        for user_id, metadata in zip(results['ids'], results['metadatas']):
+            rows.append((
+                user_id,
+                metadata['email'],
+                metadata['password'],
+                metadata['full_name'],
+                metadata.get('created_at', '')
+            ))
+        
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO users (user_id, email, password, full_name, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+    
+    @staticmethod
+    def _row_to_user(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        """Convert a database row to a user dictionary"""
+        if row is None:
+            return None
+        return {
+            "id": row["user_id"],
+            "email": row["email"],
+            "password": row["password"],
+            "full_name": row["full_name"]
+        }
@@ -4,15 +4,46 @@ Creates and manages ChromaDB vector store for semantic search
 """
 
 import os
+import math
+import base64
+import asyncio
 import logging
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, List, Optional
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+import chromadb
+import numpy as np
 from langchain.schema import Document
-from dotenv import load_dotenv
+
+# The LangChain wrappers, the OpenAI SDK and dotenv are imported where they
+# are used, so importing this module (or running the local backend) does not
+# pay for them
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from retrieval import (
+    build_faiss_index,
+    build_keyword_index,
+    maximal_marginal_relevance,
+    save_embedding_matrix,
+    unit_rows
+)
+from embeddings import (
+    DEFAULT_LOCAL_MODEL,
+    DocumentEmbeddingCache,
+    LocalEmbeddings,
+    embedding_identity,
+    get_embedding_backend,
+    get_embedding_dimensions
+)
 
 # Configure logging
 logging.basicConfig(
@@ -35,10 +66,45 @@ class VectorStoreConfig:
     """Configuration for vector store"""
     persist_directory: str = "./chroma_db"
     collection_name: str = "nelfund_docs"
-    embedding_model: str = "text-embedding-3-large"
+    # Same model the RAG agent queries with; shortened to embedding_dimensions
+    embedding_model: str = "text-embedding-3-small"
+    # "openai" or "local"; defaults to the EMBEDDING_BACKEND environment variable
+    embedding_backend: str = field(default_factory=get_embedding_backend)
+    local_embedding_model: str = DEFAULT_LOCAL_MODEL
+    # Shortened OpenAI vectors (None keeps the model's full size); defaults to
+    # the EMBEDDING_DIMENSIONS environment variable
+    embedding_dimensions: Optional[int] = field(default_factory=get_embedding_dimensions)
     request_timeout: float = 20.0
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    embedding_batch_size: int = 2048  # OpenAI's per-request input limit
+    # OpenAI rejects embedding requests over 300k tokens; keep some headroom
+    max_tokens_per_request: int = 250_000
+    embedding_concurrency: int = 8
+    # Smallest batch worth its own request when spreading a small corpus
+    # across the concurrent requests
+    embedding_min_batch: int = 64
+    # HNSW index settings, applied when the collection is created. The corpus
+    # is built once and queried many times, so build effort is kept modest.
+    hnsw_space: str = "cosine"
+    hnsw_m: int = 16
+    hnsw_construction_ef: int = 100
+    hnsw_search_ef: int = 64
+    # Chunk embeddings from earlier builds, reused for unchanged chunks.
+    # Lives outside persist_directory, which force_recreate wipes; None disables.
+    embedding_cache_path: Optional[str] = "./embedding_cache.db"
+    # Storage for the agent's memory-mapped search matrix: "float16" or "int8"
+    # (Chroma itself always keeps float32)
+    matrix_quantization: str = "float16"
+    # Approximate-nearest-neighbour index the agent uses once the corpus is
+    # too large for brute force: "chroma" (its HNSW index) or "faiss"
+    # (memory-mapped; IVF-PQ beyond faiss_ivfpq_threshold vectors)
+    ann_backend: str = "chroma"
+    faiss_ivfpq_threshold: int = 100_000
+    # In-process cache of search results: exact (query, k) matches, then
+    # queries whose embeddings are at least this similar
+    search_cache_size: int = 128
+    search_cache_threshold: float = 0.97
 
 
 class VectorStoreError(Exception):
@@ -61,15 +127,42 @@ class NELFUNDVectorStore:
         Raises:
             VectorStoreError: If API key is not configured
         """
+        from dotenv import load_dotenv
+        
         load_dotenv()
         
         self.config = config or VectorStoreConfig()
-        self.vectorstore: Optional[Chroma] = None
+        self.vectorstore: Optional["Chroma"] = None
+        # Native client and collection, used directly for searches; opened
+        # when the store is loaded or created
+        self._client = None
+        self._collection = None
+        
+        # (query, k) -> {"embedding": unit vector, "results": [(Document, score)]}
+        self._search_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._search_cache_lock = threading.Lock()
         
         self._initialize_embeddings()
     
+    @property
+    def embedding_id(self) -> str:
+        """Identity of the configured vector space, stored on the collection"""
+        if self.config.embedding_backend == "local":
+            return embedding_identity("local", self.config.local_embedding_model)
+        return embedding_identity(
+            "openai", self.config.embedding_model, self.config.embedding_dimensions
+        )
+    
     def _initialize_embeddings(self) -> None:
-        """Initialize OpenAI embeddings with error handling"""
+        """Initialize OpenAI or local embeddings with error handling"""
+        if self.config.embedding_backend == "local":
+            try:
+                self.embeddings = LocalEmbeddings(self.config.local_embedding_model)
+                logger.info(f"✓ Local embeddings initialized ({self.config.local_embedding_model})")
+            except Exception as e:
+                raise VectorStoreError(f"Failed to initialize embeddings: {e}")
+            return
+        
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise VectorStoreError(
@@ -78,13 +171,18 @@ class NELFUNDVectorStore:
             )
         
         try:
+            from langchain_openai import OpenAIEmbeddings
+            
             self.embeddings = OpenAIEmbeddings(
                 model=self.config.embedding_model,
+                dimensions=self.config.embedding_dimensions,
+                chunk_size=self.config.embedding_batch_size,
                 openai_api_key=api_key,
                 request_timeout=self.config.request_timeout,
                 max_retries=3,
                 show_progress_bar=True
             )
+            self._api_key = api_key
             logger.info(f"✓ OpenAI embeddings initialized ({self.config.embedding_model})")
         except Exception as e:
             raise VectorStoreError(f"Failed to initialize embeddings: {e}")
@@ -93,7 +191,7 @@ class NELFUNDVectorStore:
         self,
         documents: List[Document],
         force_recreate: bool = False
-    ) -> Chroma:
+    ) -> "Chroma":
         """
         Create or load vector store from documents
         
@@ -107,6 +205,7 @@ class NELFUNDVectorStore:
         Raises:
             VectorStoreError: If vector store creation fails
         """
+        self._clear_search_cache()
         db_exists = os.path.exists(self.config.persist_directory)
         
         if db_exists and not force_recreate:
@@ -119,20 +218,208 @@ class NELFUNDVectorStore:
         
         return self._create_new_store(documents)
     
-    def _load_existing_store(self) -> Chroma:
+    def _token_counts(self, texts: List[str]) -> List[int]:
+        """Count tokens per text with the OpenAI embedding tokenizer"""
+        encoding = None
+        if tiktoken is not None:
+            try:
+                # Every OpenAI embedding model uses cl100k_base
+                encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"Could not load tokenizer ({e}); estimating token counts")
+        
+        if encoding is None:
+            # English averages ~4 characters per token; 3 leaves headroom
+            return [len(text) // 3 + 1 for text in texts]
+        return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
+    
+    def _pack_batches(self, texts: List[str], batch_size: int) -> List[List[str]]:
+        """
+        Group texts into requests of at most batch_size texts and
+        max_tokens_per_request tokens, preserving order
+        """
+        batches: List[List[str]] = []
+        batch: List[str] = []
+        batch_tokens = 0
+        for text, tokens in zip(texts, self._token_counts(texts)):
+            if batch and (
+                len(batch) >= batch_size
+                or batch_tokens + tokens > self.config.max_tokens_per_request
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    async def _embed_all(
+        self,
+        texts: List[str],
+        on_batch: Optional[Callable[[int, np.ndarray], None]] = None
+    ) -> np.ndarray:
+        """
+        Embed texts in large batches, several requests in flight at once
+        
+        Args:
+            texts: Chunk texts to embed
+            on_batch: Called with (offset of the batch in texts, its vectors)
+                as each batch arrives. Runs in a worker thread, one call at
+                a time, while the remaining requests are still in flight.
+            
+        Returns:
+            float32 matrix with one row per text, in input order
+        """
+        # A corpus smaller than one full batch is still split across the
+        # concurrent requests rather than sent as one long serial request
+        batch_size = min(
+            self.config.embedding_batch_size,
+            max(
+                self.config.embedding_min_batch,
+                math.ceil(len(texts) / self.config.embedding_concurrency)
+            )
+        )
+        batches = self._pack_batches(texts, batch_size)
+        offsets = [0]
+        for batch in batches[:-1]:
+            offsets.append(offsets[-1] + len(batch))
+        semaphore = asyncio.Semaphore(self.config.embedding_concurrency)
+        write_lock = asyncio.Lock()
+        
+        from openai import AsyncOpenAI
+        
+        client = AsyncOpenAI(
+            api_key=self._api_key,
+            timeout=self.config.request_timeout,
+            max_retries=3
+        )
+        
+        # Ask for the raw float32 bytes: the SDK would otherwise
+        # decode them into lists of Python floats only for us to pack them
+        # back into arrays
+        options = {"encoding_format": "base64"}
+        if self.config.embedding_dimensions:
+            options["dimensions"] = self.config.embedding_dimensions
+        
+        async def embed_batch(index: int, batch: List[str]) -> np.ndarray:
+            async with semaphore:
+                response = await client.embeddings.create(
+                    model=self.config.embedding_model,
+                    input=batch,
+                    **options
+                )
+            logger.info(f"   Embedded batch {index + 1}/{len(batches)} ({len(batch)} chunks)")
+            vectors = np.stack([
+                np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32)
+                for item in sorted(response.data, key=lambda item: item.index)
+            ])
+            
+            if on_batch is not None:
+                async with write_lock:
+                    await asyncio.to_thread(on_batch, offsets[index], vectors)
+            return vectors
+        
+        try:
+            results = await asyncio.gather(
+                *(embed_batch(i, batch) for i, batch in enumerate(batches))
+            )
+        finally:
+            await client.close()
+        
+        return np.concatenate(results)
+    
+    def _embed_documents(
+        self,
+        texts: List[str],
+        on_vectors: Optional[Callable[[List[int], np.ndarray], None]] = None
+    ) -> np.ndarray:
+        """
+        Embed chunk texts, reusing vectors cached by earlier builds
+        
+        Args:
+            texts: Chunk texts to embed
+            on_vectors: Called with (positions in texts, their vectors) for
+                the cached vectors and then for each freshly embedded batch
+            
+        Returns:
+            float32 matrix with one row per text, in input order
+        """
+        cache = None
+        if self.config.embedding_cache_path:
+            cache = DocumentEmbeddingCache(self.config.embedding_cache_path, self.embedding_id)
+        
+        try:
+            vectors = cache.get_many(texts) if cache else [None] * len(texts)
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            logger.info(
+                f"🔄 Embedding {len(missing)} documents in batch "
+                f"({len(texts) - len(missing)} reused from cache)..."
+            )
+            
+            cached = [i for i, vector in enumerate(vectors) if vector is not None]
+            if on_vectors is not None and cached:
+                on_vectors(cached, np.stack([vectors[i] for i in cached]))
+            if not missing:
+                return np.stack(vectors)
+            
+            missing_texts = [texts[i] for i in missing]
+            if self.config.embedding_backend == "local":
+                fresh = np.asarray(self.embeddings.embed_documents(missing_texts), dtype=np.float32)
+                if on_vectors is not None:
+                    on_vectors(missing, fresh)
+            else:
+                on_batch = None
+                if on_vectors is not None:
+                    def on_batch(offset: int, batch: np.ndarray) -> None:
+                        on_vectors(missing[offset:offset + len(batch)], batch)
+                fresh = asyncio.run(self._embed_all(missing_texts, on_batch))
+            
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+            if cache:
+                cache.put_many(missing_texts, fresh)
+            return np.stack(vectors)
+        finally:
+            if cache:
+                cache.close()
+    
+    def _load_existing_store(self) -> "Chroma":
         """Load existing vectorstore from disk"""
         try:
+            from langchain_community.vectorstores import Chroma
+            
+            self._client = chromadb.PersistentClient(path=self.config.persist_directory)
+            self._collection = self._client.get_or_create_collection(
+                name=self.config.collection_name
+            )
             self.vectorstore = Chroma(
-                persist_directory=self.config.persist_directory,
+                client=self._client,
                 embedding_function=self.embeddings,
                 collection_name=self.config.collection_name
             )
-            logger.info("✓ Vector store loaded successfully")
-            return self.vectorstore
         except Exception as e:
             raise VectorStoreError(f"Failed to load vectorstore: {e}")
+        
+        # Stores that predate the identity record are refused too: nothing
+        # says which model or size built them
+        stored_id = (self._collection.metadata or {}).get("embedding")
+        if stored_id != self.embedding_id:
+            if stored_id:
+                built_with = f"{stored_id} embeddings"
+            else:
+                sample = self._collection.get(limit=1, include=["embeddings"])["embeddings"]
+                size = f"{len(sample[0])}-dimension " if sample is not None and len(sample) else ""
+                built_with = f"unrecorded {size}embeddings"
+            raise VectorStoreError(
+                f"Vector store was built with {built_with} but "
+                f"{self.embedding_id} is configured. Recreate it with setup_vectordb.py"
+            )
+        
+        logger.info("✓ Vector store loaded successfully")
+        return self.vectorstore
     
-    def _create_new_store(self, documents: List[Document]) -> Chroma:
+    def _create_new_store(self, documents: List[Document]) -> "Chroma":
         """Create new vectorstore from documents"""
         logger.info(f"Creating vectorstore with {len(documents)} chunks...")
         logger.info("⏳ Embedding documents (this may take 2-5 minutes)...")
@@ -142,28 +429,92 @@ class NELFUNDVectorStore:
             # Create directory if it doesn't exist
             os.makedirs(self.config.persist_directory, exist_ok=True)
             
-            # Test single embedding first
-            logger.info("🧪 Testing single embedding...")
-            test_vec = self.embeddings.embed_query("test")
-            logger.info(f"✓ Single embedding works (vector size: {len(test_vec)})")
+            # A probe request costs a full round-trip before the real work;
+            # the first batch fails just as fast on a bad key, so only probe
+            # when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🧪 Testing single embedding...")
+                test_vec = self.embeddings.embed_query("test")
+                logger.debug(f"✓ Single embedding works (vector size: {len(test_vec)})")
             
-            # Now embed all documents
-            logger.info(f"🔄 Embedding {len(documents)} documents in batch...")
-            self.vectorstore = Chroma.from_documents(
-                documents=documents,
-                embedding=self.embeddings,
-                persist_directory=self.config.persist_directory,
-                collection_name=self.config.collection_name
+            texts = [doc.page_content for doc in documents]
+            ids = [str(doc.metadata.get("chunk_id", i)) for i, doc in enumerate(documents)]
+            metadatas = [doc.metadata for doc in documents]
+            
+            # The embedding identity is recorded only after everything below
+            # has been written. A build that stops partway (rate limit,
+            # network, Ctrl-C) leaves a collection without one, which loading
+            # refuses instead of serving an incomplete index.
+            index_settings = {
+                "hnsw:M": self.config.hnsw_m,
+                "hnsw:construction_ef": self.config.hnsw_construction_ef,
+                "hnsw:search_ef": self.config.hnsw_search_ef
+            }
+            client = chromadb.PersistentClient(path=self.config.persist_directory)
+            collection = client.get_or_create_collection(
+                name=self.config.collection_name,
+                metadata={"hnsw:space": self.config.hnsw_space, **index_settings}
             )
+            max_batch = client.get_max_batch_size()
             
-            logger.info("✓ Embedding complete, persisting to disk...")
+            def write(positions: List[int], batch: np.ndarray) -> None:
+                # Shortened vectors are no longer unit length; normalise so
+                # cosine scores stay comparable
+                batch = unit_rows(batch)
+                for start in range(0, len(positions), max_batch):
+                    part = positions[start:start + max_batch]
+                    collection.add(
+                        ids=[ids[i] for i in part],
+                        embeddings=batch[start:start + max_batch],
+                        documents=[texts[i] for i in part],
+                        metadatas=[metadatas[i] for i in part]
+                    )
             
-            # Handle both old and new Chroma versions
-            try:
-                self.vectorstore.persist()
-                logger.info("✓ Vectorstore persisted to disk")
-            except AttributeError:
-                pass  # Newer Chroma versions auto-persist
+            # Now embed all documents. OpenAI batches run concurrently and
+            # each is written to the collection as soon as it arrives, so
+            # Chroma's writes overlap the remaining requests. PersistentClient
+            # writes through, so no persist() is needed.
+            vectors = self._embed_documents(texts, on_vectors=write)
+            vectors = unit_rows(vectors)
+            
+            logger.info(f"✓ Embedding complete (vector size: {vectors.shape[-1]}), writing search indexes...")
+            
+            # Compact copy of the matrix that the agent memory-maps for
+            # brute-force search instead of loading the HNSW index
+            save_embedding_matrix(
+                self.config.persist_directory,
+                ids,
+                vectors,
+                texts,
+                metadatas,
+                self.embedding_id,
+                self.config.matrix_quantization
+            )
+            if self.config.ann_backend == "faiss":
+                build_faiss_index(
+                    self.config.persist_directory,
+                    vectors,
+                    self.config.faiss_ivfpq_threshold
+                )
+            # Full-text index over the same chunks for hybrid keyword search
+            build_keyword_index(self.config.persist_directory, ids, texts, metadatas)
+            
+            # modify() replaces the whole metadata, and Chroma rejects
+            # hnsw:space there (the distance function is fixed at creation),
+            # so the other settings are carried over without it
+            collection.modify(metadata={"embedding": self.embedding_id, **index_settings})
+            
+            self._client = client
+            self._collection = collection
+            
+            from langchain_community.vectorstores import Chroma
+            
+            # Wrap the collection for LangChain retrievers
+            self.vectorstore = Chroma(
+                client=client,
+                embedding_function=self.embeddings,
+                collection_name=self.config.collection_name
+            )
             
             logger.info(f"✓ Vector store created at {self.config.persist_directory}")
             return self.vectorstore
@@ -183,7 +534,7 @@ class NELFUNDVectorStore:
         except Exception as e:
             logger.warning(f"Could not clear {directory}: {e}")
     
-    def load_vectorstore(self) -> Chroma:
+    def load_vectorstore(self) -> "Chroma":
         """
         Load existing vector store from disk
         
@@ -199,8 +550,65 @@ class NELFUNDVectorStore:
                 "Create one first using create_vectorstore()"
             )
         
+        self._clear_search_cache()
         return self._load_existing_store()
     
+    def _ensure_loaded(self) -> None:
+        """Load the store from disk on first use"""
+        # Compare with None: Chroma defines __len__, so truth-testing the
+        # wrapper runs a count query against the collection on every call
+        if self._collection is None:
+            self.load_vectorstore()
+    
+    def _clear_search_cache(self) -> None:
+        """Forget cached results (the store is being replaced or reloaded)"""
+        with self._search_cache_lock:
+            self._search_cache.clear()
+    
+    def _cached_search(self, query: str, k: int) -> List[tuple]:
+        """
+        Scored search through the in-process result cache
+        
+        An exact (query, k) hit costs nothing. On a miss the query is
+        embedded once; if a cached query with the same k is nearly
+        identical, its results are reused, otherwise Chroma is searched.
+        
+        Args:
+            query: Search query string
+            k: Number of results to return
+            
+        Returns:
+            List of (Document, score) tuples
+        """
+        key = (query, k)
+        with self._search_cache_lock:
+            entry = self._search_cache.get(key)
+            if entry is not None:
+                self._search_cache.move_to_end(key)
+                return list(entry["results"])
+        
+        embedding = unit_rows(np.asarray(self.embeddings.embed_query(query), dtype=np.float32))
+        
+        with self._search_cache_lock:
+            keys = [cached for cached in self._search_cache if cached[1] == k]
+            if keys:
+                matrix = np.stack([self._search_cache[cached]["embedding"] for cached in keys])
+                if matrix.shape[1] == len(embedding):
+                    scores = matrix @ embedding
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.config.search_cache_threshold:
+                        self._search_cache.move_to_end(keys[best])
+                        return list(self._search_cache[keys[best]]["results"])
+        
+        results = self.raw_search(embedding.tolist(), k=k)
+        
+        with self._search_cache_lock:
+            self._search_cache[key] = {"embedding": embedding, "results": results}
+            self._search_cache.move_to_end(key)
+            while len(self._search_cache) > self.config.search_cache_size:
+                self._search_cache.popitem(last=False)
+        return list(results)
+    
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """
         Search for relevant documents using semantic similarity
@@ -212,12 +620,11 @@ class NELFUNDVectorStore:
         Returns:
             List of relevant Documents
         """
-        if not self.vectorstore:
-            self.load_vectorstore()
+        self._ensure_loaded()
         
         try:
             logger.info(f"Searching for: '{query}'")
-            results = self.vectorstore.similarity_search(query, k=k)
+            results = [doc for doc, _ in self._cached_search(query, k)]
             logger.info(f"Found {len(results)} relevant chunks")
             return results
         except Exception as e:
@@ -239,15 +646,98 @@ class NELFUNDVectorStore:
         Returns:
             List of (Document, score) tuples
         """
-        if not self.vectorstore:
-            self.load_vectorstore()
+        self._ensure_loaded()
         
         try:
-            return self.vectorstore.similarity_search_with_score(query, k=k)
+            return self._cached_search(query, k)
         except Exception as e:
             logger.error(f"Scored search failed: {e}")
             raise VectorStoreError(f"Scored search failed: {e}")
     
+    def similarity_search_many(self, queries: List[str], k: int = 4) -> List[List[tuple]]:
+        """
+        Scored search for several queries, embedded in a single request
+        
+        Args:
+            queries: Search query strings
+            k: Number of results per query
+            
+        Returns:
+            One list of (Document, score) tuples per query
+        """
+        self._ensure_loaded()
+        
+        try:
+            embeddings = self.embeddings.embed_documents(queries)
+            return [self.raw_search(embedding, k=k) for embedding in embeddings]
+        except Exception as e:
+            logger.error(f"Batch search failed: {e}")
+            raise VectorStoreError(f"Batch search failed: {e}")
+    
+    def raw_search(self, embedding: List[float], k: int = 4) -> List[tuple]:
+        """
+        Search the native collection with a precomputed query embedding
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            
+        Returns:
+            List of (Document, distance) tuples, closest first
+        """
+        self._ensure_loaded()
+        
+        results = self._collection.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+        docs = [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(results["documents"][0], results["metadatas"][0])
+        ]
+        return list(zip(docs, results["distances"][0]))
+    
+    def mmr_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 12,
+        lambda_mult: float = 0.5
+    ) -> List[tuple]:
+        """
+        Search with a precomputed embedding, re-ranked for diversity (MMR)
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            fetch_k: Number of nearest candidates to re-rank
+            lambda_mult: 1.0 ranks purely by relevance, 0.0 purely by diversity
+            
+        Returns:
+            List of (Document, distance) tuples in MMR order
+        """
+        self._ensure_loaded()
+        
+        results = self._collection.query(
+            query_embeddings=[embedding],
+            n_results=fetch_k,
+            include=["embeddings", "documents", "metadatas", "distances"]
+        )
+        selected = maximal_marginal_relevance(
+            embedding, results["embeddings"][0], k=k, lambda_mult=lambda_mult
+        )
+        return [
+            (
+                Document(
+                    page_content=results["documents"][0][i],
+                    metadata=results["metadatas"][0][i] or {}
+                ),
+                results["distances"][0][i]
+            )
+            for i in selected
+        ]
+    
     def get_retriever(self, k: int = 4):
         """
         Get a retriever object for use in RAG chains
@@ -258,31 +748,32 @@ class NELFUNDVectorStore:
         Returns:
             LangChain retriever object
         """
-        if not self.vectorstore:
-            self.load_vectorstore()
+        self._ensure_loaded()
         
         return self.vectorstore.as_retriever(
             search_type="similarity",
             search_kwargs={"k": k}
         )
     
-    def test_search(self, query: str, k: int = 3) -> None:
+    def test_search(self, query: str, k: int = 3, results: Optional[List[tuple]] = None) -> None:
         """
         Test search and display formatted results
         
         Args:
             query: Test query string
             k: Number of results to display
+            results: Results already fetched for the query (searches if None)
         """
         print(f"\n{'='*80}")
         print(f"SEARCH: {query}")
         print(f"{'='*80}\n")
         
-        try:
-            results = self.similarity_search_with_score(query, k=k)
-        except VectorStoreError as e:
-            logger.error(f"Search error: {e}")
-            return
+        if results is None:
+            try:
+                results = self.similarity_search_with_score(query, k=k)
+            except VectorStoreError as e:
+                logger.error(f"Search error: {e}")
+                return
         
         if not results:
             print("❌ No results found.\n")
@@ -329,7 +820,6 @@ def setup_vector_store(
     logger.info("\n[1/3] Loading documents...")
     try:
         processor = NELFUNDDocumentProcessor(data_directory=data_directory)
-        documents = processor.load_documents()
         chunks = processor.chunk_documents(
             chunk_size=config.chunk_size,
             chunk_overlap=config.chunk_overlap
@@ -365,11 +855,15 @@ def test_vector_store(vector_store: NELFUNDVectorStore) -> None:
     
     logger.info("\n[3/3] Testing search functionality...\n")
     
-    for query in test_queries:
-        try:
-            vector_store.test_search(query, k=3)
-        except VectorStoreError as e:
-            logger.error(f"Test query failed: {e}")
+    # Embed every test query in one request, then print the results in order
+    try:
+        all_results = vector_store.similarity_search_many(test_queries, k=3)
+    except VectorStoreError as e:
+        logger.error(f"Test queries failed: {e}")
+        return
+    
+    for query, results in zip(test_queries, all_results):
+        vector_store.test_search(query, k=3, results=results)
     
     logger.info("="*80)
     logger.info("✓ VECTOR STORE SETUP COMPLETE!")